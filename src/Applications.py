@@ -0,0 +1,113 @@
+import json
+import logging
+import os
+import sqlite3
+import threading
+import time
+
+from CONST import *
+from Company import create_table
+
+logger = logging.getLogger(__name__)
+
+# Statuses of the applications table. A company is claimed by a worker until the outcome of its application is recorded.
+CLAIMED = "claimed"
+APPLIED_STATUS = "applied"
+IGNORED_STATUS = "ignored"
+
+class Applications:
+    """
+    Applied and ignored companies, stored in the applications table of the SQLite DB with their status, time and reason.
+    """
+    def __init__(self, db=DB_FILE):
+        self.db = db
+        create_table(db)
+        self.lock = threading.Lock()
+        self.conn = sqlite3.connect(db, timeout=30, check_same_thread=False)
+
+    def __contains__(self, name):
+        with self.lock:
+            return self.conn.execute('SELECT 1 FROM applications WHERE name = ?', (name,)).fetchone() is not None
+
+    def names(self, status=None):
+        """
+        Return the set of the company names, all of them or the ones with the given status.
+        """
+        query = 'SELECT name FROM applications'
+        params = ()
+        if status is not None:
+            query += ' WHERE status = ?'
+            params = (status,)
+        with self.lock:
+            return {name for name, in self.conn.execute(query, params)}
+
+    def claim(self, name):
+        """
+        Reserve a company before applying, return False if it already has a row.
+        The insert is atomic, so two workers, even in different processes, never both claim a company.
+        """
+        with self.lock, self.conn:
+            cursor = self.conn.execute(
+                'INSERT INTO applications (name, status, updated_at) VALUES (?, ?, ?) ON CONFLICT(name) DO NOTHING',
+                (name, CLAIMED, time.time())
+            )
+            return cursor.rowcount == 1
+
+    def release_stale_claims(self, timeout=APPLY_CLAIM_TIMEOUT):
+        """
+        Delete the claims older than timeout seconds, left by workers stopped before recording an outcome,
+        so their companies are candidates again. Return the number of released claims.
+        """
+        with self.lock, self.conn:
+            cursor = self.conn.execute(
+                'DELETE FROM applications WHERE status = ? AND updated_at < ?', (CLAIMED, time.time() - timeout)
+            )
+        if cursor.rowcount:
+            logger.warning(f"{cursor.rowcount} stale claims released")
+        return cursor.rowcount
+
+    def record(self, name, status, reason=None):
+        """
+        Set the outcome of the application to a company.
+        """
+        with self.lock, self.conn:
+            self.conn.execute('''
+                INSERT INTO applications (name, status, updated_at, reason) VALUES (?, ?, ?, ?)
+                ON CONFLICT(name) DO UPDATE SET
+                    status = excluded.status,
+                    updated_at = excluded.updated_at,
+                    reason = excluded.reason
+            ''', (name, status, time.time(), reason))
+
+    def import_json(self, file, status):
+        """
+        Import a JSON list of company names with the given status once, then rename the file to <file>.imported.
+        """
+        if not os.path.exists(file):
+            return 0
+        try:
+            with open(file, "r", encoding="utf-8") as f:
+                names = json.load(f)
+        except (ValueError, UnicodeDecodeError) as e:
+            logger.error(f"Unable to import {file}: {e}")
+            return 0
+        now = time.time()
+        with self.lock, self.conn:
+            self.conn.executemany(
+                'INSERT OR IGNORE INTO applications (name, status, updated_at, reason) VALUES (?, ?, ?, ?)',
+                [(name, status, now, f"imported from {file}") for name in names]
+            )
+        os.replace(file, file + ".imported")
+        logger.info(f"{len(names)} {status} companies imported from {file}")
+        return len(names)
+
+    def import_lists(self, applied=APPLIED, ignored=IGNORED):
+        return self.import_json(applied, APPLIED_STATUS) + self.import_json(ignored, IGNORED_STATUS)
+
+    def counts(self):
+        with self.lock:
+            return dict(self.conn.execute('SELECT status, COUNT(*) FROM applications GROUP BY status').fetchall())
+
+    def close(self):
+        with self.lock:
+            self.conn.close()
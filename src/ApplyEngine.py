@@ -0,0 +1,126 @@
+# -*- coding: utf-8 -*-
+import logging
+import queue
+import threading
+import time
+
+from CONST import *
+from SELECTORS import *
+from apply import connect, apply_to_company
+from Applications import Applications, APPLIED_STATUS, IGNORED_STATUS
+from functions import init_driver, get_url
+from RateLimiter import TokenBucket
+
+logger = logging.getLogger(__name__)
+
+# Cookie fields accepted by WebDriver.add_cookie
+COOKIE_FIELDS = ("name", "value", "domain", "path", "secure", "httpOnly", "expiry")
+
+class ApplyEngine:
+    """
+    Apply to companies with a small pool of WebDriver workers sharing the session of a single login.
+    Each company is claimed in the applications table before its application, so it is never applied to twice.
+    """
+    def __init__(self, applications=None, size=APPLY_WORKERS, rate_per_hour=APPLY_RATE_PER_HOUR):
+        self.applications = applications if applications is not None else Applications(DB_FILE)
+        self.size = size
+        # One bucket for the account, shared by all the workers
+        self.bucket = TokenBucket(rate_per_hour / 3600, 1)
+        self.lock = threading.Lock()
+        self.tasks = queue.Queue()
+        self.cookies = []
+        self.drivers = []
+        self.outcomes = {"applied": 0, "ignored": 0}
+
+    def login(self):
+        """
+        Log in once and keep the session cookies for the other workers.
+        """
+        driver = init_driver()
+        if not driver:
+            raise RuntimeError("Failed to initialize the web driver for the login.")
+        connect(driver)
+        # Cookies are only readable once the login redirected away from the login page
+        deadline = time.monotonic() + WAIT_MAX_TIMEOUT
+        while driver.current_url.startswith(LOGIN_URL) and time.monotonic() < deadline:
+            time.sleep(0.2)
+        self.cookies = [{key: cookie[key] for key in COOKIE_FIELDS if key in cookie} for cookie in driver.get_cookies()]
+        self.drivers.append(driver)
+        logger.info(f"[Apply] Logged in, {len(self.cookies)} session cookies exported.")
+        return driver
+
+    def _session_driver(self):
+        """
+        Start a driver and copy the session cookies into it.
+        """
+        driver = init_driver()
+        if not driver:
+            return None
+        # Cookies can only be added to the domain of the page currently loaded
+        get_url(driver, MAIN_URL)
+        for cookie in self.cookies:
+            try:
+                driver.add_cookie(cookie)
+            except Exception as e:
+                logger.error(f"[Apply] Cookie {cookie.get('name')} not copied : {e}")
+        with self.lock:
+            self.drivers.append(driver)
+        return driver
+
+    def record(self, company, success, reason=None):
+        """
+        Record the outcome of an application in the applications table.
+        """
+        self.applications.record(company.name, APPLIED_STATUS if success else IGNORED_STATUS, reason)
+        with self.lock:
+            self.outcomes["applied" if success else "ignored"] += 1
+        logger.info(f"Application {'succeeded' if success else 'failed'} for {company.name}.")
+
+    def _work(self, driver):
+        while True:
+            company = self.tasks.get()
+            try:
+                if company is None:
+                    return
+                # Companies already applied to, ignored or claimed by another worker are skipped
+                if not self.applications.claim(company.name):
+                    continue
+                delay = self.bucket.reserve()
+                if delay > 0:
+                    time.sleep(delay)
+                reason = None
+                try:
+                    success = apply_to_company(driver, company)
+                    if not success:
+                        reason = "application steps failed"
+                except Exception as e:
+                    logger.error(f"[Apply] Error applying to {company.name} : {e}")
+                    success, reason = False, str(e)
+                self.record(company, success, reason)
+            finally:
+                self.tasks.task_done()
+
+    def run(self, companies):
+        """
+        Apply to the companies with the pool of workers and return the number of applied and ignored ones.
+        """
+        if not self.drivers:
+            self.login()
+        drivers = [self.drivers[0]] + [driver for driver in (self._session_driver() for _ in range(self.size - 1)) if driver]
+        for company in companies:
+            self.tasks.put(company)
+        threads = [
+            threading.Thread(target=self._work, args=(driver,), name=f"apply-worker-{index}", daemon=True)
+            for index, driver in enumerate(drivers)
+        ]
+        for thread in threads:
+            self.tasks.put(None)
+            thread.start()
+        for thread in threads:
+            thread.join()
+        return self.outcomes
+
+    def close(self):
+        for driver in self.drivers:
+            driver.quit()
+        self.drivers = []
@@ -2,4 +2,106 @@ APPLIED = "data/applied.json"
 IGNORED = "data/ignored.json"
 LOGGING_FILE = "log/process.log"
 JSON_FILE = "data/data.json"
-DB_FILE = "data/data.db"
\ No newline at end of file
+DB_FILE = "data/data.db"
+
+# Append-only JSON Lines store of the companies, compacted every JSONL_COMPACT_EVERY appended records
+JSONL_FILE = "data/data.jsonl"
+JSONL_COMPACT_EVERY = 10000
+
+# Backend used to fetch the jobs and showcase pages of each company: "driver" or "http"
+FETCH_BACKEND = "driver"
+HTTP_CONCURRENCY = 8
+HTTP_TIMEOUT = 30
+# Attempts after a 429 or 5xx response, each one after a backoff
+HTTP_RETRIES = 3
+
+# WebDriver profile: "fast" runs headless with the eager page load strategy and blocks heavy resources, "default" is a full browser
+BROWSER_PROFILE = "fast"
+# URL patterns blocked by the fast Chrome profile: images, media, fonts and third-party trackers
+BLOCKED_RESOURCES = [
+    "*.png", "*.jpg", "*.jpeg", "*.gif", "*.webp", "*.avif", "*.svg", "*.ico",
+    "*.mp4", "*.webm", "*.mp3", "*.woff", "*.woff2", "*.ttf", "*.otf",
+]
+BLOCKED_HOSTS = [
+    "*googletagmanager.com*", "*google-analytics.com*", "*doubleclick.net*", "*facebook.net*",
+    "*hotjar.com*", "*segment.io*", "*segment.com*", "*intercom.io*", "*hubspot.com*", "*didomi.io*",
+]
+
+# Number of WebDriver workers scraping company details in parallel (1 disables the pool)
+DRIVER_POOL_SIZE = 1
+
+# Bounds of the adaptive timeout used when waiting for a selector, in seconds
+WAIT_MIN_TIMEOUT = 2
+WAIT_MAX_TIMEOUT = 15
+
+# Companies are written by a background sink in batches of at most SINK_BATCH_SIZE rows or SINK_FLUSH_INTERVAL seconds
+SINK_BATCH_SIZE = 100
+SINK_FLUSH_INTERVAL = 2
+SINK_QUEUE_SIZE = 1000
+
+# Optional Bloom filter file used instead of an in-memory set of known company names, e.g. "data/companies.bloom"
+KNOWN_COMPANIES_BLOOM = None
+
+# On-disk page cache, with a TTL in seconds per page kind
+CACHE_ENABLED = True
+CACHE_DIR = "data/cache"
+CACHE_MAX_BYTES = 500 * 1024 * 1024
+CACHE_TTL = {
+    "listing": 60 * 60,
+    "jobs": 24 * 60 * 60,
+    "showcase": 7 * 24 * 60 * 60,
+}
+
+# HTML parser backend: "html.parser" or "lxml". With PARSE_SUBTREES, listing pages only parse the company cards and pagination
+PARSER_BACKEND = "lxml"
+PARSE_SUBTREES = True
+
+# Metrics written every METRICS_INTERVAL seconds in the Prometheus text format, and as a JSON summary at the end of a run
+METRICS_FILE = "log/metrics.prom"
+METRICS_SUMMARY_FILE = "log/metrics.json"
+METRICS_INTERVAL = 15
+
+# Number of rows per executemany call when saving companies in bulk
+SQLITE_CHUNK_SIZE = 5000
+
+# Rows read from the DB and written at a time by the export command
+EXPORT_CHUNK_SIZE = 10000
+
+# Listing-only crawl: listing pages fetched in parallel and the file its CSV sink writes to
+LISTING_WORKERS = 8
+LISTING_FILE = "data/listing.csv"
+
+# Search backend of the listing pages, read from the listing page when left to None, and hits fetched per request
+SEARCH_APP_ID = None
+SEARCH_API_KEY = None
+SEARCH_INDEX = None
+SEARCH_HITS_PER_PAGE = 1000
+
+# Requests per second and burst allowed per host, shared by the WebDriver navigations and the HTTP fetcher
+RATE_LIMIT = 2.0
+RATE_BURST = 4
+# Delay after the nth throttled response: BACKOFF_BASE ** n seconds, at most BACKOFF_MAX, unless the server sent Retry-After
+BACKOFF_BASE = 2
+BACKOFF_MAX = 120
+
+# Listing queries crawled by the scheduler: listing URLs, or {attribute: [values]} refinements as in refinementList
+# e.g. one query per sector, or a sector and a location copied from the filters of a listing URL
+CRAWL_QUERIES = [
+    {"sectors_name.fr.Tech": ["Logiciels", "SaaS / Cloud Services", "Intelligence artificielle / Machine Learning"]},
+    {"sectors_name.fr.Tech": ["Big Data", "Cybersécurité", "Application mobile"]},
+]
+SCHEDULER_WORKERS = 8
+
+# Multi-process mode: company cards leased per request, lease duration in seconds, and wait while other workers hold leases
+WORKER_LEASE_BATCH = 5
+WORKER_LEASE_SECONDS = 300
+WORKER_POLL_INTERVAL = 5
+
+# Auto-apply: WebDriver workers sharing the session of one login, and applications per hour for the account
+APPLY_WORKERS = 3
+APPLY_RATE_PER_HOUR = 30
+# Seconds after which the claim of a company by an apply worker that never recorded the outcome is released
+APPLY_CLAIM_TIMEOUT = 3600
+
+# Time budget, in milliseconds, of the imports and the run of the data commands of cli.py (export, query, stats), see benchmark.py --startup
+STARTUP_BUDGET_MS = 100
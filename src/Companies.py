@@ -1,11 +1,67 @@
 import sqlite3
 import json
+import logging
+import time
 
-from Company import Company, get_json
+from CONST import *
+from Company import Company, get_json, connect, connect_read_only, create_table, save_offers, UPSERT_SQL
+from JsonlStore import JsonlStore, dump_json_list
+
+# Columns of the companies table and the matching Company arguments
+COLUMNS = {
+    "name": "name",
+    "url": "url",
+    "web_site": "web_site",
+    "domain": "domain",
+    "location": "location",
+    "number_of_salaries": "number_salaries",
+    "average_age": "average_age",
+    "offers": "offers",
+    "all_offers": "all_offers",
+    "spontaneous_application": "spontaneous_application",
+}
+
+def company_from_row(row):
+    """
+    Build a Company from a sqlite3.Row, the columns missing from the row being None.
+    """
+    values = {COLUMNS[column]: row[column] for column in row.keys() if column in COLUMNS}
+    all_offers = values.get("all_offers")
+    if isinstance(all_offers, (str, bytes, bytearray)):
+        values["all_offers"] = json.loads(all_offers)
+    return Company(**{argument: values.get(argument) for argument in COLUMNS.values()})
+
+def company_from_json(name, company):
+    """
+    Build a Company from one entry of the JSON format of Company.formated_data.
+    """
+    return Company(
+        name,
+        company.get("URL ", "Unknown"),
+        company.get("Web Site", "Unknown"),
+        company.get("Domain", "Unknown"),
+        company.get("Location", "Unknown"),
+        company.get("Number of Salaries", "Unknown"),
+        company.get("Average Age", "Unknown"),
+        company.get("Offers Number", "Unknown"),
+        company.get("Offers List", "Unknown"),
+        company.get("Spontaneous application", "Unknown"),
+    )
 
 class Companies:
     def __init__(self, companies: list[Company] ):
         self.companies = companies
+        self.names = {company.name for company in companies}
+
+    def add_company(self, company):
+        """
+        Add a company unless one with the same name is already in the collection.
+        """
+        if company.name in self.names:
+            return False
+        self.names.add(company.name)
+        self.companies.append(company)
+        return True
 
     def show_companies(self):
         for company in self.companies:
@@ -13,52 +69,99 @@ class Companies:
 
     def save_companies_to_json(self, file):
         with open(file, 'w', encoding='utf-8') as f:
-            json.dump([company.formated_data() for company in self.companies], f, ensure_ascii=False, indent=4)
+            dump_json_list((company.formated_data() for company in self.companies), f)
 
-    def save_companies_to_sqlite(self, db):
-        from Company import create_table
-        create_table(db) 
-        with sqlite3.connect(db) as conn:
+    def save_companies_to_sqlite(self, db, chunk_size=SQLITE_CHUNK_SIZE):
+        """
+        Upsert all the companies with executemany in chunks and return the rows written per second.
+        """
+        start = time.perf_counter()
+        create_table(db)
+        conn = connect(db)
+        try:
             cursor = conn.cursor()
-            for company in self.companies:
-                company.save_to_sqlite(cursor)
+            for index in range(0, len(self.companies), chunk_size):
+                chunk = self.companies[index:index + chunk_size]
+                cursor.executemany(UPSERT_SQL, [company.to_row() for company in chunk])
+                save_offers(cursor, chunk)
             conn.commit()
+        finally:
+            conn.close()
+        elapsed = time.perf_counter() - start
+        rate = len(self.companies) / elapsed if elapsed else 0
+        logging.info(f"[SQLite] {len(self.companies)} companies saved to {db} ({rate:.0f} rows/s)")
+        return rate
+
+    def iter_companies_from_sqlite(self, db, columns=None, exclude_names=None, chunk_size=1000, exclude_applications=False, **filters):
+        """
+        Yield the companies of the DB lazily, reading the cursor chunk_size rows at a time.
+        columns restricts the columns read, the other Company fields being None.
+        Filters are pushed down to the WHERE clause: a value matches with =, a list or tuple with IN.
+        exclude_names drops the companies with these names, exclude_applications the ones in the applications table.
+        """
+        columns = list(columns) if columns else list(COLUMNS)
+        if "name" not in columns:
+            columns.insert(0, "name")
+        unknown = [column for column in columns + list(filters) if column not in COLUMNS]
+        if unknown:
+            raise ValueError(f"Unknown companies columns: {unknown}")
 
-    def get_companies_from_sqlite(self, db):
-        with sqlite3.connect(db) as conn:
+        clauses, params = [], []
+        for column, value in filters.items():
+            if isinstance(value, (list, tuple, set)):
+                clauses.append(f"{column} IN ({', '.join('?' * len(value))})")
+                params.extend(value)
+            else:
+                clauses.append(f"{column} = ?")
+                params.append(value)
+
+        # Reading never creates nor migrates the DB, the write paths do
+        conn = connect_read_only(db)
+        try:
+            conn.row_factory = sqlite3.Row
             cursor = conn.cursor()
-            cursor.execute('SELECT * FROM companies')
-            all_companies = cursor.fetchall()
-
-            return Companies([
-                Company(
-                    name=row[1],
-                    url=row[2],
-                    web_site=row[3],
-                    domain=row[4],
-                    location=row[5],
-                    number_salaries=row[6],
-                    average_age=row[6],
-                    offers=row[7],
-                    all_offers= json.loads(row[8]) if isinstance(row[8], (str, bytes, bytearray)) else row[8],
-                    spontaneous_application=row[9],
-                ) for row in all_companies
-            ])
+            if exclude_names:
+                cursor.execute('CREATE TEMP TABLE IF NOT EXISTS excluded (name TEXT PRIMARY KEY)')
+                cursor.executemany('INSERT OR IGNORE INTO excluded (name) VALUES (?)', [(name,) for name in exclude_names])
+                clauses.append('name NOT IN (SELECT name FROM excluded)')
+            if exclude_applications:
+                clauses.append('name NOT IN (SELECT name FROM applications)')
+            query = f"SELECT {', '.join(columns)} FROM companies"
+            if clauses:
+                query += " WHERE " + " AND ".join(clauses)
+            cursor.execute(query + " ORDER BY id", params)
+            while True:
+                rows = cursor.fetchmany(chunk_size)
+                if not rows:
+                    break
+                for row in rows:
+                    yield company_from_row(row)
+        finally:
+            conn.close()
 
-    def get_companies_from_json(self, file):
-        all_companies = get_json(file)
-        return Companies([
-            Company(
-                name,
-                company.get("URL ", "Unknown"),
-                company.get("Web Site", "Unknown"),
-                company.get("Domain", "Unknown"),
-                company.get("Location", "Unknown"),
-                company.get("Number of Salaries", "Unknown"),
-                company.get("Average Age", "Unknown"),
-                company.get("Offers Number", "Unknown"),
-                company.get("Offers List", "Unknown"),
-                company.get("Spontaneous application", "Unknown"),
-            ) for companies in all_companies for name, company in companies.items()
-        ])
+    def get_companies_from_sqlite(self, db, **filters):
+        return Companies(list(self.iter_companies_from_sqlite(db, **filters)))
+
+    def get_candidates_from_sqlite(self, db, excluded_names=None, spontaneous="Yes", exclude_applications=False):
+        """
+        Return the companies with the given spontaneous application flag whose name is not excluded, in one indexed query.
+        """
+        return self.get_companies_from_sqlite(
+            db, exclude_names=excluded_names, exclude_applications=exclude_applications, spontaneous_application=spontaneous
+        )
 
+    def iter_companies_from_json(self, file):
+        """
+        Yield the companies of a JSON file lazily.
+        A .jsonl file is streamed line by line, keeping the latest record of each company.
+        """
+        if file.endswith(".jsonl"):
+            records = JsonlStore(file).iter_latest()
+        else:
+            records = get_json(file)
+        for companies in records:
+            for name, company in companies.items():
+                yield company_from_json(name, company)
+
+    def get_companies_from_json(self, file):
+        return Companies(list(self.iter_companies_from_json(file)))
@@ -1,4 +1,6 @@
 import json
+import os
+import pathlib
 import sqlite3
 import logging
 
@@ -11,10 +13,78 @@ def get_json(file):
         logging.error(f"Unexpected Error while getting JSON file {file}: {e}")
         return {}
 
-def create_table(db):
-    conn = sqlite3.connect(db)
-    cursor = conn.cursor()
+# Databases whose schema was already created by this process
+_initialized_dbs = set()
+
+def connect(db):
+    """
+    Open a SQLite connection with the pragmas used for writing.
+    """
+    conn = sqlite3.connect(db, timeout=30)
+    conn.execute('PRAGMA synchronous=NORMAL')
+    return conn
+
+def connect_read_only(db):
+    """
+    Open a read-only SQLite connection, which neither creates the DB nor migrates its schema.
+    """
+    if not os.path.exists(db):
+        raise FileNotFoundError(f"SQLite DB {db} does not exist")
+    return sqlite3.connect(pathlib.Path(db).absolute().as_uri() + "?mode=ro", uri=True, timeout=30)
+
+# Entries of all_offers that are markers rather than job titles
+NON_OFFER_TITLES = ("Candidature spontanée", "Aucune offre d'emploi disponible")
+
+def offer_titles(all_offers):
+    """
+    Return the job titles of an all_offers value, flattening the nested lists of the JSON format.
+    """
+    if isinstance(all_offers, str):
+        try:
+            all_offers = json.loads(all_offers)
+        except ValueError:
+            all_offers = [all_offers]
+    titles = []
+    for offer in all_offers or []:
+        if isinstance(offer, list):
+            titles.extend(offer_titles(offer))
+        elif isinstance(offer, str) and offer not in NON_OFFER_TITLES:
+            titles.append(offer)
+    return titles
+
+def migrate_offers(cursor):
     cursor.execute('''
+        CREATE TABLE IF NOT EXISTS offers (
+            id INTEGER PRIMARY KEY AUTOINCREMENT,
+            company_id INTEGER NOT NULL REFERENCES companies(id) ON DELETE CASCADE,
+            title TEXT NOT NULL
+        );
+    ''')
+    cursor.execute('CREATE INDEX IF NOT EXISTS offers_company_id ON offers (company_id)')
+    cursor.execute('CREATE INDEX IF NOT EXISTS companies_location ON companies (location)')
+    cursor.execute('CREATE INDEX IF NOT EXISTS companies_domain ON companies (domain)')
+    cursor.execute('CREATE INDEX IF NOT EXISTS companies_spontaneous_application ON companies (spontaneous_application)')
+    # Fill the offers table from the JSON column of the existing rows
+    rows = cursor.execute('SELECT id, all_offers FROM companies').fetchall()
+    cursor.executemany(
+        'INSERT INTO offers (company_id, title) VALUES (?, ?)',
+        [(company_id, title) for company_id, all_offers in rows for title in offer_titles(all_offers)]
+    )
+
+def migrate_applications(cursor):
+    cursor.execute('''
+        CREATE TABLE IF NOT EXISTS applications (
+            name TEXT PRIMARY KEY,
+            status TEXT NOT NULL,
+            updated_at REAL,
+            reason TEXT
+        );
+    ''')
+    cursor.execute('CREATE INDEX IF NOT EXISTS applications_status ON applications (status)')
+
+# Schema migrations, applied in order. The index + 1 of the last one applied is stored in PRAGMA user_version.
+MIGRATIONS = [
+    lambda cursor: cursor.execute('''
         CREATE TABLE IF NOT EXISTS companies (
             id INTEGER PRIMARY KEY AUTOINCREMENT,
             name TEXT UNIQUE,
@@ -28,11 +98,80 @@ def create_table(db):
             all_offers TEXT,
             spontaneous_application TEXT
         );
-    ''')
-    conn.commit()
-    conn.close()
+    '''),
+    migrate_offers,
+    migrate_applications,
+]
+
+def create_table(db):
+    """
+    Bring the schema up to date and enable WAL mode, once per database and process.
+    """
+    key = os.path.abspath(db)
+    if key in _initialized_dbs:
+        return
+    conn = sqlite3.connect(db, timeout=30)
+    try:
+        conn.execute('PRAGMA journal_mode=WAL')
+        # BEGIN IMMEDIATE stops two processes from running the same migration
+        conn.isolation_level = None
+        conn.execute('BEGIN IMMEDIATE')
+        version = conn.execute('PRAGMA user_version').fetchone()[0]
+        cursor = conn.cursor()
+        for number, migration in enumerate(MIGRATIONS[version:], start=version + 1):
+            migration(cursor)
+            cursor.execute(f'PRAGMA user_version = {number}')
+            logging.info(f"[SQLite] {db} migrated to schema version {number}")
+        conn.execute('COMMIT')
+    except Exception:
+        if conn.in_transaction:
+            conn.execute('ROLLBACK')
+        raise
+    finally:
+        conn.close()
+    _initialized_dbs.add(key)
+
+UPSERT_SQL = '''
+    INSERT INTO companies (
+        name, url, web_site, domain, location,
+        number_of_salaries, average_age, offers, all_offers,
+        spontaneous_application
+    ) VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, ?)
+    ON CONFLICT(name) DO UPDATE SET
+        url = excluded.url,
+        web_site = CASE
+            WHEN excluded.web_site IS NOT NULL AND excluded.web_site != '' AND excluded.web_site != 'N/A'
+            THEN excluded.web_site
+            ELSE companies.web_site
+        END,
+        domain = excluded.domain,
+        location = excluded.location,
+        number_of_salaries = excluded.number_of_salaries,
+        average_age = excluded.average_age,
+        offers = excluded.offers,
+        all_offers = excluded.all_offers,
+        spontaneous_application = excluded.spontaneous_application
+'''
+
+DELETE_OFFERS_SQL = 'DELETE FROM offers WHERE company_id = (SELECT id FROM companies WHERE name = ?)'
+INSERT_OFFER_SQL = 'INSERT INTO offers (company_id, title) SELECT id, ? FROM companies WHERE name = ?'
+
+def save_offers(cursor, companies):
+    """
+    Replace the rows of the offers table of the given companies, after they were upserted.
+    """
+    cursor.executemany(DELETE_OFFERS_SQL, [(company.name,) for company in companies])
+    cursor.executemany(INSERT_OFFER_SQL, [
+        (title, company.name) for company in companies for title in offer_titles(company.all_offers)
+    ])
 
 class Company :
+    # No per-instance __dict__, large collections of companies stay small in memory
+    __slots__ = (
+        "name", "url_wtj", "url_web_site", "domain", "location",
+        "number_of_salaries", "avg_age", "offers", "all_offers", "spontane",
+    )
+
     def __init__(self,
                  name,
                  url,
@@ -88,58 +227,49 @@ class Company :
             f"Spontaneous Application: {self.spontane}\n")
 
     def save_data_to_json(self, file):
-        data = get_json(file)
-        new_value = data | self.formated_data()
-        with open(file, "w", encoding="utf-8") as f:
-            json.dump(new_value,f,ensure_ascii=False, indent=4)
+        """
+        Append the company as one line of a JSON Lines file, see JsonlStore.
+        """
+        with open(file, "a", encoding="utf-8") as f:
+            f.write(json.dumps(self.formated_data(), ensure_ascii=False) + "\n")
 
     def save_one_to_sqlite(self, db):
         create_table(db)
         try:
-            with sqlite3.connect(db) as conn:
+            with connect(db) as conn:
                 cursor = conn.cursor()
                 self.save_to_sqlite(cursor)
                 conn.commit()
         except sqlite3.Error as e:
             print(f"[SQLite] Error while saving {self.name} : {e}")
 
+    def to_row(self):
+        """
+        Return the parameters of UPSERT_SQL for this company.
+        """
+        # normaliser la valeur web_site pour ne pas insérer "N/A" ou chaîne vide
+        web_site_val = None if self.url_web_site in (None, "", "N/A") else self.url_web_site
+        return (
+            self.name,
+            self.url_wtj,
+            web_site_val,
+            self.domain,
+            self.location,
+            self.number_of_salaries,
+            self.avg_age,
+            self.offers,
+            json.dumps(self.all_offers, ensure_ascii=False),
+            self.spontane
+        )
+
     def save_to_sqlite(self, cursor):
+        """
+        Upsert the company and its offers, return False if it could not be written.
+        """
         try:
-            # normaliser la valeur web_site pour ne pas insérer "N/A" ou chaîne vide
-            web_site_val = None if self.url_web_site in (None, "", "N/A") else self.url_web_site
-
-            cursor.execute('''
-                INSERT INTO companies (
-                    name, url, web_site, domain, location,
-                    number_of_salaries, average_age, offers, all_offers,
-                    spontaneous_application
-                ) VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, ?)
-                ON CONFLICT(name) DO UPDATE SET
-                    url = excluded.url,
-                    web_site = CASE
-                        WHEN excluded.web_site IS NOT NULL AND excluded.web_site != '' AND excluded.web_site != 'N/A'
-                        THEN excluded.web_site
-                        ELSE companies.web_site
-                    END,
-                    domain = excluded.domain,
-                    location = excluded.location,
-                    number_of_salaries = excluded.number_of_salaries,
-                    average_age = excluded.average_age,
-                    offers = excluded.offers,
-                    all_offers = excluded.all_offers,
-                    spontaneous_application = excluded.spontaneous_application
-            ''', (
-                self.name,
-                self.url_wtj,
-                web_site_val,
-                self.domain,
-                self.location,
-                self.number_of_salaries,
-                self.avg_age,
-                self.offers,
-                json.dumps(self.all_offers, ensure_ascii=False),
-                self.spontane
-            ))
+            cursor.execute(UPSERT_SQL, self.to_row())
+            save_offers(cursor, [self])
+            return True
         except Exception as e:
             print(f"[SQLite] Error while saving {self.name} : {e}")
-
+            return False
@@ -0,0 +1,175 @@
+import sys
+from array import array
+from itertools import compress
+
+from CONST import *
+from Company import Company
+from Companies import Companies
+
+# Value stored in the integer columns for a missing number
+MISSING = -(2 ** 63)
+
+def and_masks(first, second):
+    """
+    Combine two bytes masks of 0 and 1 values.
+    """
+    return (int.from_bytes(first, "little") & int.from_bytes(second, "little")).to_bytes(len(first), "little")
+
+def flatten_offers(all_offers):
+    """
+    Return the offers as a flat list, the JSON format nesting them in a list.
+    """
+    if all_offers is None:
+        return []
+    if not isinstance(all_offers, list):
+        return [all_offers]
+    return [title for offer in all_offers for title in flatten_offers(offer)] if any(isinstance(offer, list) for offer in all_offers) else all_offers
+
+class StringColumn:
+    """
+    Dictionary-encoded column of repeated strings: each distinct value is stored once and rows hold its code.
+    Codes are single bytes while there are at most 256 distinct values, so masks are computed with bytes.translate.
+    """
+    def __init__(self):
+        self.values = []
+        self.codes_by_value = {}
+        self.codes = array("B")
+
+    def encode(self, value):
+        code = self.codes_by_value.get(value)
+        if code is None:
+            code = len(self.values)
+            self.values.append(sys.intern(value) if isinstance(value, str) else value)
+            self.codes_by_value[value] = code
+            if code == 256:
+                self.codes = array("I", self.codes)
+        return code
+
+    def append(self, value):
+        self.codes.append(self.encode(value))
+
+    def __getitem__(self, index):
+        return self.values[self.codes[index]]
+
+    def codes_of(self, values):
+        return {self.codes_by_value[value] for value in values if value in self.codes_by_value}
+
+    def mask(self, values):
+        wanted = self.codes_of(values)
+        if self.codes.typecode == "B":
+            return self.codes.tobytes().translate(bytes(code in wanted for code in range(256)))
+        return bytes(map(wanted.__contains__, self.codes))
+
+class CompanyTable:
+    """
+    Columnar container of companies.
+    Numbers are kept in typed arrays, repeated strings (domain, location, spontaneous flag, offer titles) are dictionary-encoded.
+    """
+    UNIQUE_FIELDS = ("name", "url_wtj", "url_web_site")
+    STRING_FIELDS = ("domain", "location", "spontane")
+    INT_FIELDS = ("number_of_salaries", "avg_age", "offers")
+
+    def __init__(self):
+        self.unique = {field: [] for field in self.UNIQUE_FIELDS}
+        self.strings = {field: StringColumn() for field in self.STRING_FIELDS}
+        self.ints = {field: array("q") for field in self.INT_FIELDS}
+        # Offer titles of row i are titles.codes[offsets[i]:offsets[i + 1]]
+        self.titles = StringColumn()
+        self.offsets = array("I", [0])
+
+    def __len__(self):
+        return len(self.unique["name"])
+
+    def append(self, company):
+        for field in self.UNIQUE_FIELDS:
+            self.unique[field].append(getattr(company, field))
+        for field in self.STRING_FIELDS:
+            self.strings[field].append(getattr(company, field))
+        for field in self.INT_FIELDS:
+            value = getattr(company, field)
+            self.ints[field].append(value if isinstance(value, int) else MISSING)
+        for title in flatten_offers(company.all_offers):
+            self.titles.append(title)
+        self.offsets.append(len(self.titles.codes))
+
+    def extend(self, companies):
+        for company in companies:
+            self.append(company)
+        return self
+
+    def row(self, index):
+        """
+        Build the Company of one row.
+        """
+        ints = {field: self.ints[field][index] for field in self.INT_FIELDS}
+        return Company(
+            self.unique["name"][index],
+            self.unique["url_wtj"][index],
+            self.unique["url_web_site"][index],
+            self.strings["domain"][index],
+            self.strings["location"][index],
+            *(None if ints[field] == MISSING else ints[field] for field in self.INT_FIELDS),
+            [self.titles.values[code] for code in self.titles.codes[self.offsets[index]:self.offsets[index + 1]]],
+            self.strings["spontane"][index],
+        )
+
+    def __iter__(self):
+        for index in range(len(self)):
+            yield self.row(index)
+
+    def mask(self, key, value):
+        """
+        Return a bytes mask of the rows matching one condition, computed without a Python-level loop.
+        """
+        if key in self.strings:
+            return self.strings[key].mask(value if isinstance(value, (list, tuple, set)) else [value])
+        if key.startswith(("min_", "max_")) and key[4:] in self.ints:
+            column = self.ints[key[4:]]
+            if key.startswith("min_"):
+                return bytes(map(max(value, MISSING + 1).__le__, column))
+            return and_masks(bytes(map(value.__ge__, column)), bytes(map(MISSING.__ne__, column)))
+        if key in self.unique:
+            values = set(value) if isinstance(value, (list, tuple, set)) else {value}
+            return bytes(map(values.__contains__, self.unique[key]))
+        raise ValueError(f"Unknown condition: {key}")
+
+    def where(self, **conditions):
+        """
+        Return the indexes of the rows matching all the conditions.
+        String fields match a value or any value of a list, integer fields take min_<field> and max_<field> bounds.
+        """
+        mask = b"\x01" * len(self)
+        for key, value in conditions.items():
+            mask = and_masks(mask, self.mask(key, value))
+        return array("I", compress(range(len(self)), mask))
+
+    def take(self, indexes):
+        """
+        Return a new table with the given rows.
+        """
+        return CompanyTable().extend(self.row(index) for index in indexes)
+
+    def filter(self, **conditions):
+        return self.take(self.where(**conditions))
+
+    def to_companies(self):
+        return Companies(list(self))
+
+    @classmethod
+    def from_companies(cls, companies):
+        return cls().extend(companies.companies if isinstance(companies, Companies) else companies)
+
+    @classmethod
+    def from_sqlite(cls, db, **filters):
+        return cls().extend(Companies([]).iter_companies_from_sqlite(db, **filters))
+
+    def to_sqlite(self, db, chunk_size=SQLITE_CHUNK_SIZE):
+        for start in range(0, len(self), chunk_size):
+            Companies([self.row(index) for index in range(start, min(start + chunk_size, len(self)))]).save_companies_to_sqlite(db)
+
+    @classmethod
+    def from_json(cls, file):
+        return cls.from_companies(Companies([]).get_companies_from_json(file))
+
+    def to_json(self, file):
+        self.to_companies().save_companies_to_json(file)
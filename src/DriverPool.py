@@ -0,0 +1,152 @@
+# -*- coding: utf-8 -*-
+import logging
+import queue
+import threading
+
+from CONST import *
+from SELECTORS import *
+from Metrics import metrics
+from functions import init_driver, get_card_name, get_companys_infos, construct_company_object
+
+logger = logging.getLogger(__name__)
+
+class DriverPool:
+    """
+    Pool of WebDriver workers scraping company details from a shared queue of company cards.
+    """
+    def __init__(self, companies=None, existing_companies = [], size=DRIVER_POOL_SIZE, queue_size=None, max_restarts=3, on_result=None):
+        # Scraped companies are merged into this Companies collection when one is given
+        self.companies = companies
+        # Called from the worker threads with (key, company), company being None when scraping failed
+        self.on_result = on_result
+        self.existing_companies = existing_companies
+        self.size = size
+        self.max_restarts = max_restarts
+        # The queue is bounded so the producer blocks instead of piling up cards faster than they are scraped
+        self.tasks = queue.Queue(maxsize=queue_size or size * 2)
+        self.lock = threading.Lock()
+        self.submitted = set()
+        self.workers = []
+
+    def start(self):
+        for index in range(self.size):
+            worker = threading.Thread(target=self._work, args=(index,), name=f"driver-worker-{index}", daemon=True)
+            worker.start()
+            self.workers.append(worker)
+        return self
+
+    def submit(self, block, key=None):
+        """
+        Queue a company card, skipping companies already known or already queued.
+        """
+        name = get_card_name(block)
+        if name in self.existing_companies or name in self.submitted:
+            logger.info(f"Company {name} already exists. Skipping.")
+            metrics.inc("skips")
+            return False
+        self.submitted.add(name)
+        self.tasks.put((key, block))
+        return True
+
+    def join(self):
+        """
+        Wait until every queued card has been processed.
+        """
+        self.tasks.join()
+
+    def close(self, cancel=False):
+        """
+        Stop the workers once the queue is drained and quit their drivers.
+        With cancel=True, the cards still waiting in the queue are dropped.
+        """
+        if cancel:
+            try:
+                while True:
+                    self.tasks.get_nowait()
+                    self.tasks.task_done()
+            except queue.Empty:
+                pass
+        for _ in self.workers:
+            self.tasks.put(None)
+        for worker in self.workers:
+            worker.join()
+        self.workers = []
+
+    def _new_driver(self):
+        for attempt in range(self.max_restarts):
+            driver = init_driver()
+            if driver:
+                return driver
+            logger.error(f"Failed to start a WebDriver for the pool (attempt {attempt + 1}/{self.max_restarts}).")
+        return None
+
+    @staticmethod
+    def _is_alive(driver):
+        try:
+            driver.current_url
+            return True
+        except Exception:
+            return False
+
+    @staticmethod
+    def _quit(driver):
+        try:
+            driver.quit()
+        except Exception:
+            pass
+
+    def _scrape(self, driver, block):
+        infos = get_companys_infos(driver, block)
+        if not infos:
+            return None
+        company = construct_company_object(infos)
+        if not company:
+            return None
+        if self.companies is not None:
+            with self.lock:
+                self.companies.add_company(company)
+        return company
+
+    def _work(self, index):
+        # Failed starts in a row: a worker without a driver tries again on its next cards, max_restarts times in all
+        failures = 0
+        driver = self._new_driver()
+        if driver is None:
+            failures += 1
+        while True:
+            task = self.tasks.get()
+            company = None
+            try:
+                if task is None:
+                    break
+                key, block = task
+                if driver is None and failures < self.max_restarts:
+                    driver = self._new_driver()
+                    failures = 0 if driver else failures + 1
+                if driver is None:
+                    logger.error(f"Worker {index} has no WebDriver, dropping a company card.")
+                    continue
+                company = self._scrape(driver, block)
+                # The scraping functions log and swallow driver errors, so a crash is detected afterwards
+                if not self._is_alive(driver):
+                    logger.error(f"WebDriver of worker {index} crashed, restarting it.")
+                    self._quit(driver)
+                    driver = self._new_driver()
+                    if driver:
+                        company = self._scrape(driver, block)
+                    else:
+                        failures += 1
+            except Exception as e:
+                logger.error(f"Worker {index} failed on a company card : {e}")
+            finally:
+                if task is not None and self.on_result is not None:
+                    self.on_result(task[0], company)
+                self.tasks.task_done()
+        if driver:
+            self._quit(driver)
+
+    def __enter__(self):
+        return self.start()
+
+    def __exit__(self, *exc):
+        self.close()
@@ -0,0 +1,145 @@
+import sqlite3
+import threading
+import time
+
+PENDING = "pending"
+IN_PROGRESS = "in_progress"
+DONE = "done"
+FAILED = "failed"
+
+def create_frontier_table(conn):
+    conn.execute('''
+        CREATE TABLE IF NOT EXISTS frontier (
+            url TEXT PRIMARY KEY,
+            kind TEXT NOT NULL,
+            parent TEXT,
+            payload TEXT,
+            state TEXT NOT NULL DEFAULT 'pending',
+            attempts INTEGER NOT NULL DEFAULT 0,
+            updated_at REAL,
+            lease_owner TEXT,
+            lease_expires REAL
+        );
+    ''')
+    # Frontier tables created before job leasing get the lease columns
+    columns = {row[1] for row in conn.execute('PRAGMA table_info(frontier)')}
+    for column, definition in (("lease_owner", "TEXT"), ("lease_expires", "REAL")):
+        if column not in columns:
+            conn.execute(f'ALTER TABLE frontier ADD COLUMN {column} {definition}')
+    conn.execute('CREATE INDEX IF NOT EXISTS frontier_kind_state ON frontier (kind, state)')
+    conn.commit()
+
+# Items that can be leased: pending ones, failed ones with attempts left,
+# and the ones whose lease expired because their worker stopped or crashed
+LEASABLE = '''
+    kind = ? AND (state = 'pending' OR (
+        state IN ('failed', 'in_progress') AND attempts < ?
+        AND (state = 'failed' OR lease_expires IS NULL OR lease_expires < ?)
+    ))
+'''
+
+def update_states(cursor, urls, state):
+    """
+    Set the state of frontier items with the given cursor, within the caller's transaction.
+    """
+    attempts = 1 if state == IN_PROGRESS else 0
+    now = time.time()
+    cursor.executemany(
+        'UPDATE frontier SET state = ?, attempts = attempts + ?, updated_at = ? WHERE url = ?',
+        [(state, attempts, now, url) for url in urls]
+    )
+
+class Frontier:
+    """
+    Crawl frontier stored in the SQLite DB.
+    Listing pages and company cards are recorded with their state so an interrupted crawl can resume where it stopped.
+    """
+    def __init__(self, db, max_attempts=3):
+        self.db = db
+        self.max_attempts = max_attempts
+        self.lock = threading.Lock()
+        self.conn = sqlite3.connect(db, timeout=30, check_same_thread=False)
+        # WAL lets the workers of other processes read the frontier while one of them leases jobs
+        self.conn.execute('PRAGMA journal_mode=WAL')
+        create_frontier_table(self.conn)
+
+    def is_empty(self, kind):
+        with self.lock:
+            row = self.conn.execute('SELECT 1 FROM frontier WHERE kind = ? LIMIT 1', (kind,)).fetchone()
+        return row is None
+
+    def add_many(self, kind, items, parent=None):
+        """
+        Add (url, payload) items, ignoring the ones already in the frontier whatever their state.
+        """
+        now = time.time()
+        with self.lock, self.conn:
+            self.conn.executemany(
+                'INSERT OR IGNORE INTO frontier (url, kind, parent, payload, updated_at) VALUES (?, ?, ?, ?, ?)',
+                [(url, kind, parent, payload, now) for url, payload in items]
+            )
+
+    def pending(self, kind, parent=None):
+        """
+        Return the (url, payload) items still to process, in insertion order.
+        Items left in progress by a stopped run and failed items with attempts left are included.
+        """
+        query = '''
+            SELECT url, payload FROM frontier
+            WHERE kind = ?
+              AND (state IN (?, ?) OR (state = ? AND attempts < ?))
+        '''
+        params = [kind, PENDING, IN_PROGRESS, FAILED, self.max_attempts]
+        if parent is not None:
+            query += ' AND parent = ?'
+            params.append(parent)
+        query += ' ORDER BY rowid'
+        with self.lock:
+            return self.conn.execute(query, params).fetchall()
+
+    def lease(self, kind, owner, count, duration):
+        """
+        Atomically lease up to count items to owner for duration seconds and return their (url, payload).
+        Until the lease expires, the items are not handed out to other workers.
+        """
+        now = time.time()
+        with self.lock, self.conn:
+            return self.conn.execute(f'''
+                UPDATE frontier SET state = ?, lease_owner = ?, lease_expires = ?, updated_at = ?
+                WHERE url IN (SELECT url FROM frontier WHERE {LEASABLE} ORDER BY rowid LIMIT ?)
+                RETURNING url, payload
+            ''', (IN_PROGRESS, owner, now + duration, now, kind, self.max_attempts, now, count)).fetchall()
+
+    def remaining(self, kind):
+        """
+        Return the number of items that can be leased or are leased and not done yet.
+        """
+        now = time.time()
+        with self.lock:
+            return self.conn.execute(f'''
+                SELECT COUNT(*) FROM frontier
+                WHERE ({LEASABLE}) OR (kind = ? AND state = ? AND lease_expires >= ?)
+            ''', (kind, self.max_attempts, now, kind, IN_PROGRESS, now)).fetchone()[0]
+
+    def set_state(self, urls, state):
+        if isinstance(urls, str):
+            urls = [urls]
+        with self.lock, self.conn:
+            update_states(self.conn, urls, state)
+
+    def get_state(self, url):
+        with self.lock:
+            row = self.conn.execute('SELECT state FROM frontier WHERE url = ?', (url,)).fetchone()
+        return row[0] if row else None
+
+    def counts(self):
+        """
+        Return the number of items per kind and state.
+        """
+        with self.lock:
+            rows = self.conn.execute('SELECT kind, state, COUNT(*) FROM frontier GROUP BY kind, state').fetchall()
+        return {(kind, state): count for kind, state, count in rows}
+
+    def close(self):
+        with self.lock:
+            self.conn.close()
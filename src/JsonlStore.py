@@ -0,0 +1,102 @@
+import json
+import logging
+import os
+
+from CONST import *
+
+class JsonlStore:
+    """
+    Append-only JSON Lines store of companies, one formated_data() record per line.
+    A company saved again is appended again; compaction keeps only its latest record.
+    """
+    def __init__(self, file=JSONL_FILE, compact_every=JSONL_COMPACT_EVERY):
+        self.file = file
+        self.compact_every = compact_every
+        self.appended = 0
+
+    def exists(self):
+        return os.path.exists(self.file)
+
+    def append_many(self, companies):
+        """
+        Append companies at the end of the file, compacting it every compact_every appended records.
+        """
+        count = 0
+        with open(self.file, "a", encoding="utf-8") as f:
+            for company in companies:
+                f.write(json.dumps(company.formated_data(), ensure_ascii=False) + "\n")
+                count += 1
+        self.appended += count
+        if self.compact_every and self.appended >= self.compact_every:
+            self.compact()
+        return count
+
+    def append(self, company):
+        return self.append_many([company])
+
+    def _iter_lines(self):
+        if not self.exists():
+            return
+        with open(self.file, "r", encoding="utf-8") as f:
+            while True:
+                offset = f.tell()
+                line = f.readline()
+                if not line:
+                    break
+                try:
+                    yield offset, json.loads(line)
+                except ValueError:
+                    # A line cut by a crash in the middle of an append
+                    logging.error(f"Invalid line at offset {offset} of {self.file}, skipping it.")
+
+    def iter_records(self):
+        """
+        Yield every record of the file, including the outdated ones.
+        """
+        for _, record in self._iter_lines():
+            yield record
+
+    def iter_latest(self):
+        """
+        Yield the latest record of each company, in the order of their last append.
+        Only the offsets of the last records are held in memory, not the records.
+        """
+        last_offsets = {}
+        for offset, record in self._iter_lines():
+            for name in record:
+                last_offsets[name] = offset
+        latest = set(last_offsets.values())
+        for offset, record in self._iter_lines():
+            if offset in latest:
+                yield record
+
+    def compact(self):
+        """
+        Rewrite the file with only the latest record of each company.
+        """
+        if not self.exists():
+            return
+        tmp = self.file + ".tmp"
+        with open(tmp, "w", encoding="utf-8") as f:
+            for record in self.iter_latest():
+                f.write(json.dumps(record, ensure_ascii=False) + "\n")
+        os.replace(tmp, self.file)
+        self.appended = 0
+
+    def export_json(self, file):
+        """
+        Write the latest records to a JSON file in the nested list format of Companies.save_companies_to_json.
+        """
+        with open(file, "w", encoding="utf-8") as f:
+            dump_json_list(self.iter_latest(), f)
+
+def dump_json_list(records, f):
+    """
+    Stream records to a file as a JSON list indented like json.dump(list, indent=4), without building the list.
+    """
+    first = True
+    for record in records:
+        f.write("[\n" if first else ",\n")
+        first = False
+        f.write("\n".join("    " + line for line in json.dumps(record, ensure_ascii=False, indent=4).split("\n")))
+    f.write("[]" if first else "\n]")
@@ -0,0 +1,139 @@
+import hashlib
+import math
+import os
+import sqlite3
+import struct
+import threading
+
+from Company import create_table
+
+class BloomFilter:
+    """
+    Bloom filter of company names saved to a file.
+    """
+    # Magic, size, hashes, rows and capacity. Files of the older header without the capacity fail the magic check.
+    MAGIC = b"BLM2"
+    HEADER = struct.Struct("<4sQQQQ")
+
+    def __init__(self, capacity, error_rate=0.001):
+        capacity = max(capacity, 1000)
+        # Number of names the filter was sized for, past which its error rate grows
+        self.capacity = capacity
+        self.size = int(-capacity * math.log(error_rate) / math.log(2) ** 2)
+        self.hashes = max(1, round(self.size / capacity * math.log(2)))
+        self.bits = bytearray((self.size + 7) // 8)
+        # Number of DB rows the filter was built from, used to detect a stale file
+        self.rows = 0
+
+    def _positions(self, name):
+        digest = hashlib.blake2b(name.encode("utf-8"), digest_size=16).digest()
+        h1, h2 = struct.unpack("<QQ", digest)
+        return [(h1 + i * h2) % self.size for i in range(self.hashes)]
+
+    def add(self, name):
+        for position in self._positions(name):
+            self.bits[position >> 3] |= 1 << (position & 7)
+
+    def __contains__(self, name):
+        return all(self.bits[position >> 3] & (1 << (position & 7)) for position in self._positions(name))
+
+    def save(self, path):
+        tmp = path + ".tmp"
+        with open(tmp, "wb") as f:
+            f.write(self.HEADER.pack(self.MAGIC, self.size, self.hashes, self.rows, self.capacity))
+            f.write(self.bits)
+        os.replace(tmp, path)
+
+    @classmethod
+    def load(cls, path):
+        """
+        Read a filter saved by save, raise ValueError if the file is of another format or truncated.
+        """
+        with open(path, "rb") as f:
+            header = f.read(cls.HEADER.size)
+            if len(header) < cls.HEADER.size or header[:len(cls.MAGIC)] != cls.MAGIC:
+                raise ValueError(f"{path} is not a Bloom filter file of this version")
+            _, size, hashes, rows, capacity = cls.HEADER.unpack(header)
+            bloom = cls.__new__(cls)
+            bloom.size, bloom.hashes, bloom.rows, bloom.capacity = size, hashes, rows, capacity
+            bloom.bits = bytearray(f.read())
+        if len(bloom.bits) != (size + 7) // 8:
+            raise ValueError(f"{path} is truncated")
+        return bloom
+
+class KnownCompanies:
+    """
+    Names of the companies already in the DB, loaded once at startup for O(1) membership checks.
+    With a Bloom filter file, the names are not held in memory: a name the filter may contain is confirmed with an indexed query.
+    """
+    def __init__(self, db, bloom_file=None, error_rate=0.001):
+        self.db = db
+        self.bloom_file = bloom_file
+        self.error_rate = error_rate
+        self.names = set()
+        self.bloom = None
+        self.lock = threading.Lock()
+        create_table(db)
+        self.conn = sqlite3.connect(db, check_same_thread=False)
+        self.load()
+
+    def load(self):
+        if self.bloom_file is None:
+            self.names = {row[0] for row in self.conn.execute('SELECT name FROM companies')}
+            return
+        rows = self.conn.execute('SELECT COUNT(*) FROM companies').fetchone()[0]
+        if os.path.exists(self.bloom_file):
+            try:
+                self.bloom = BloomFilter.load(self.bloom_file)
+            except ValueError:
+                self.bloom = None
+            if self.bloom is not None and self.bloom.rows == rows and rows <= self.bloom.capacity:
+                return
+        # The filter is missing, out of date or full
+        self.rebuild(rows)
+
+    def rebuild(self, rows):
+        """
+        Build the Bloom filter from the DB with room to grow, and save it.
+        """
+        self.bloom = BloomFilter(rows * 2, self.error_rate)
+        for (name,) in self.conn.execute('SELECT name FROM companies'):
+            self.bloom.add(name)
+        self.bloom.rows = rows
+        self.bloom.save(self.bloom_file)
+
+    def add(self, name):
+        """
+        Record a company scraped during this run.
+        """
+        self.names.add(name)
+
+    def __contains__(self, name):
+        if name in self.names:
+            return True
+        # Cards without a name tag give None, which the Bloom filter cannot hash
+        if not isinstance(name, str) or self.bloom is None or name not in self.bloom:
+            return False
+        with self.lock:
+            return self.conn.execute('SELECT 1 FROM companies WHERE name = ?', (name,)).fetchone() is not None
+
+    def __len__(self):
+        if self.bloom is not None:
+            return self.bloom.rows + len(self.names)
+        return len(self.names)
+
+    def close(self):
+        """
+        Save the Bloom filter with the companies added during this run and close the DB connection.
+        """
+        if self.bloom is not None:
+            rows = self.conn.execute('SELECT COUNT(*) FROM companies').fetchone()[0]
+            if rows > self.bloom.capacity:
+                # Adding the names would push the filter past its capacity, and its error rate up
+                self.rebuild(rows)
+            else:
+                for name in self.names:
+                    self.bloom.add(name)
+                self.bloom.rows = rows
+                self.bloom.save(self.bloom_file)
+        self.conn.close()
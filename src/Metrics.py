@@ -0,0 +1,172 @@
+import json
+import logging
+import os
+import threading
+import time
+from contextlib import contextmanager
+
+from CONST import *
+
+# Upper bounds, in seconds, of the latency histogram buckets
+BUCKETS = (0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1, 2.5, 5, 10, 30, float("inf"))
+
+class Histogram:
+    def __init__(self):
+        self.counts = [0] * len(BUCKETS)
+        self.count = 0
+        self.sum = 0.0
+        self.max = 0.0
+
+    def observe(self, value):
+        for index, bound in enumerate(BUCKETS):
+            if value <= bound:
+                self.counts[index] += 1
+                break
+        self.count += 1
+        self.sum += value
+        self.max = max(self.max, value)
+
+    def quantile(self, q):
+        """
+        Upper bound of the bucket holding the q quantile.
+        """
+        rank = q * self.count
+        seen = 0
+        for bound, count in zip(BUCKETS, self.counts):
+            seen += count
+            if seen >= rank:
+                return bound if bound != float("inf") else self.max
+        return self.max
+
+class Metrics:
+    """
+    Latency histograms per stage and counters, exported in the Prometheus text format and as a JSON summary.
+    """
+    def __init__(self, prefix="scraper"):
+        self.prefix = prefix
+        self.lock = threading.Lock()
+        self.counters = {}
+        self.histograms = {}
+        self.started = time.time()
+        self.exporter = None
+        self.stop_event = threading.Event()
+
+    def inc(self, name, value=1, **labels):
+        key = (name, tuple(sorted(labels.items())))
+        with self.lock:
+            self.counters[key] = self.counters.get(key, 0) + value
+
+    def observe(self, stage, seconds):
+        with self.lock:
+            self.histograms.setdefault(stage, Histogram()).observe(seconds)
+
+    @contextmanager
+    def timer(self, stage):
+        start = time.perf_counter()
+        try:
+            yield
+        finally:
+            self.observe(stage, time.perf_counter() - start)
+
+    def total(self, name):
+        with self.lock:
+            return sum(value for (counter, _), value in self.counters.items() if counter == name)
+
+    def to_prometheus(self):
+        lines = []
+        with self.lock:
+            names = sorted({name for name, _ in self.counters})
+            for name in names:
+                lines.append(f"# TYPE {self.prefix}_{name}_total counter")
+                for (counter, labels), value in sorted(self.counters.items()):
+                    if counter == name:
+                        lines.append(f"{self.prefix}_{name}_total{format_labels(labels)} {value}")
+            if self.histograms:
+                metric = f"{self.prefix}_stage_seconds"
+                lines.append(f"# TYPE {metric} histogram")
+                for stage, histogram in sorted(self.histograms.items()):
+                    cumulated = 0
+                    for bound, count in zip(BUCKETS, histogram.counts):
+                        cumulated += count
+                        le = "+Inf" if bound == float("inf") else repr(bound)
+                        lines.append(f'{metric}_bucket{{stage="{stage}",le="{le}"}} {cumulated}')
+                    lines.append(f'{metric}_sum{{stage="{stage}"}} {histogram.sum}')
+                    lines.append(f'{metric}_count{{stage="{stage}"}} {histogram.count}')
+        return "\n".join(lines) + "\n"
+
+    def summary(self):
+        elapsed = time.time() - self.started
+        with self.lock:
+            counters = {}
+            for (name, labels), value in sorted(self.counters.items()):
+                counters[name + format_labels(labels)] = value
+            stages = {
+                stage: {
+                    "count": histogram.count,
+                    "total_s": round(histogram.sum, 3),
+                    "avg_s": round(histogram.sum / histogram.count, 4) if histogram.count else 0,
+                    "p50_s": histogram.quantile(0.5),
+                    "p95_s": histogram.quantile(0.95),
+                    "max_s": round(histogram.max, 3),
+                } for stage, histogram in sorted(self.histograms.items())
+            }
+        companies = self.total("companies")
+        return {
+            "elapsed_s": round(elapsed, 1),
+            "companies_per_minute": round(companies / elapsed * 60, 2) if elapsed else 0,
+            "slowest_stage": max(stages, key=lambda stage: stages[stage]["total_s"]) if stages else None,
+            "counters": counters,
+            "stages": stages,
+        }
+
+    def write_prometheus(self, path=METRICS_FILE):
+        write_atomic(path, self.to_prometheus())
+
+    def write_summary(self, path=METRICS_SUMMARY_FILE):
+        write_atomic(path, json.dumps(self.summary(), ensure_ascii=False, indent=4))
+
+    def start_exporter(self, path=METRICS_FILE, interval=METRICS_INTERVAL):
+        """
+        Write the Prometheus file every interval seconds until stop_exporter is called.
+        """
+        def export():
+            while not self.stop_event.wait(interval):
+                try:
+                    self.write_prometheus(path)
+                except OSError as e:
+                    logging.getLogger(__name__).error(f"Error writing metrics to {path}: {e}")
+
+        self.stop_event.clear()
+        self.exporter = threading.Thread(target=export, name="metrics-exporter", daemon=True)
+        self.exporter.start()
+
+    def stop_exporter(self, path=METRICS_FILE):
+        if self.exporter is not None:
+            self.stop_event.set()
+            self.exporter.join()
+            self.exporter = None
+        self.write_prometheus(path)
+
+class ErrorCounter(logging.Handler):
+    """
+    Logging handler counting the errors logged anywhere in the scraper.
+    """
+    def __init__(self, metrics):
+        super().__init__(logging.ERROR)
+        self.metrics = metrics
+
+    def emit(self, record):
+        self.metrics.inc("errors")
+
+def format_labels(labels):
+    if not labels:
+        return ""
+    return "{" + ",".join(f'{key}="{value}"' for key, value in labels) + "}"
+
+def write_atomic(path, content):
+    tmp = path + ".tmp"
+    with open(tmp, "w", encoding="utf-8") as f:
+        f.write(content)
+    os.replace(tmp, path)
+
+metrics = Metrics()
@@ -0,0 +1,164 @@
+import hashlib
+import os
+import sqlite3
+import threading
+import time
+
+from CONST import *
+
+class PageCache:
+    """
+    Content-addressed on-disk cache of fetched pages, keyed by URL.
+    Entries expire after the TTL of their page kind and the least recently used ones are evicted above max_bytes.
+    """
+    def __init__(self, directory=CACHE_DIR, ttl=CACHE_TTL, max_bytes=CACHE_MAX_BYTES):
+        self.directory = directory
+        self.ttl = ttl
+        self.max_bytes = max_bytes
+        self.hits = 0
+        self.misses = 0
+        self.revalidated = 0
+        self.lock = threading.Lock()
+        os.makedirs(directory, exist_ok=True)
+        self.conn = sqlite3.connect(os.path.join(directory, "index.db"), check_same_thread=False)
+        self.conn.execute('''
+            CREATE TABLE IF NOT EXISTS pages (
+                url TEXT PRIMARY KEY,
+                kind TEXT,
+                digest TEXT,
+                size INTEGER,
+                fetched_at REAL,
+                last_access REAL,
+                etag TEXT,
+                last_modified TEXT
+            );
+        ''')
+        self.conn.execute('CREATE INDEX IF NOT EXISTS pages_last_access ON pages (last_access)')
+        self.conn.commit()
+
+    def _blob_path(self, digest):
+        return os.path.join(self.directory, digest[:2], digest + ".html")
+
+    def _read(self, digest):
+        try:
+            with open(self._blob_path(digest), "r", encoding="utf-8") as f:
+                return f.read()
+        except FileNotFoundError:
+            return None
+
+    def lookup(self, url, kind):
+        """
+        Return (html, fresh, etag, last_modified) for a cached URL, or None.
+        Stale entries are returned too so they can be revalidated.
+        """
+        with self.lock:
+            row = self.conn.execute(
+                'SELECT digest, fetched_at, etag, last_modified FROM pages WHERE url = ?', (url,)
+            ).fetchone()
+            if row is None:
+                return None
+            digest, fetched_at, etag, last_modified = row
+            html = self._read(digest)
+            if html is None:
+                self.conn.execute('DELETE FROM pages WHERE url = ?', (url,))
+                self.conn.commit()
+                return None
+            now = time.time()
+            self.conn.execute('UPDATE pages SET last_access = ? WHERE url = ?', (now, url))
+            self.conn.commit()
+        fresh = now - fetched_at < self.ttl.get(kind, 0)
+        return html, fresh, etag, last_modified
+
+    def get(self, url, kind):
+        """
+        Return the cached HTML of a URL if it is still fresh, counting hits and misses.
+        """
+        entry = self.lookup(url, kind)
+        if entry is not None and entry[1]:
+            self.record(True)
+            return entry[0]
+        self.record(False)
+        return None
+
+    def record(self, hit):
+        with self.lock:
+            if hit:
+                self.hits += 1
+            else:
+                self.misses += 1
+
+    def put(self, url, kind, html, etag=None, last_modified=None):
+        """
+        Store a page and evict the least recently used pages if the cache is too big.
+        """
+        data = html.encode("utf-8")
+        digest = hashlib.sha256(data).hexdigest()
+        path = self._blob_path(digest)
+        if not os.path.exists(path):
+            os.makedirs(os.path.dirname(path), exist_ok=True)
+            tmp = f"{path}.{threading.get_ident()}.tmp"
+            with open(tmp, "wb") as f:
+                f.write(data)
+            os.replace(tmp, path)
+        now = time.time()
+        with self.lock:
+            previous = self.conn.execute('SELECT digest FROM pages WHERE url = ?', (url,)).fetchone()
+            self.conn.execute('''
+                INSERT INTO pages (url, kind, digest, size, fetched_at, last_access, etag, last_modified)
+                VALUES (?, ?, ?, ?, ?, ?, ?, ?)
+                ON CONFLICT(url) DO UPDATE SET
+                    kind = excluded.kind,
+                    digest = excluded.digest,
+                    size = excluded.size,
+                    fetched_at = excluded.fetched_at,
+                    last_access = excluded.last_access,
+                    etag = excluded.etag,
+                    last_modified = excluded.last_modified
+            ''', (url, kind, digest, len(data), now, now, etag, last_modified))
+            if previous and previous[0] != digest:
+                self._drop_blob(previous[0])
+            self._evict()
+            self.conn.commit()
+
+    def touch(self, url):
+        """
+        Mark a cached page as fresh again after the server answered 304 Not Modified.
+        """
+        with self.lock:
+            self.revalidated += 1
+            self.hits += 1
+            now = time.time()
+            self.conn.execute('UPDATE pages SET fetched_at = ?, last_access = ? WHERE url = ?', (now, now, url))
+            self.conn.commit()
+
+    def _drop_blob(self, digest):
+        # Blobs are shared by URLs with identical content, only remove unreferenced ones
+        if self.conn.execute('SELECT 1 FROM pages WHERE digest = ? LIMIT 1', (digest,)).fetchone() is None:
+            try:
+                os.remove(self._blob_path(digest))
+            except FileNotFoundError:
+                pass
+
+    def _evict(self):
+        total = self.conn.execute('SELECT COALESCE(SUM(size), 0) FROM pages').fetchone()[0]
+        if total <= self.max_bytes:
+            return
+        for url, digest, size in self.conn.execute('SELECT url, digest, size FROM pages ORDER BY last_access').fetchall():
+            self.conn.execute('DELETE FROM pages WHERE url = ?', (url,))
+            self._drop_blob(digest)
+            total -= size
+            if total <= self.max_bytes:
+                break
+
+    def stats(self):
+        requests = self.hits + self.misses
+        return {
+            "hits": self.hits,
+            "misses": self.misses,
+            "revalidated": self.revalidated,
+            "hit_rate": round(self.hits / requests, 3) if requests else 0.0,
+        }
+
+    def close(self):
+        with self.lock:
+            self.conn.close()
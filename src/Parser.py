@@ -0,0 +1,91 @@
+# -*- coding: utf-8 -*-
+import logging
+
+import soupsieve
+from bs4 import BeautifulSoup, SoupStrainer
+
+from CONST import *
+from SELECTORS import CSS_SELECTORS
+
+logger = logging.getLogger(__name__)
+
+# Selectors are compiled once instead of on every select call
+COMPILED_SELECTORS = {key: soupsieve.compile(selector) for key, selector in CSS_SELECTORS.items()}
+
+# Subtrees kept when only part of a page is needed, by page kind.
+# Listing pages only need the company cards and the pagination.
+SUBTREES = {
+    "listing": SoupStrainer(attrs={"data-testid": ["company-card", "companies-search-pagination"]}),
+}
+
+BACKENDS = ("html.parser", "lxml")
+
+def get_backend(backend=None):
+    """
+    Return the BeautifulSoup tree builder to use, falling back to html.parser when lxml is not installed.
+    """
+    backend = backend or PARSER_BACKEND
+    if backend == "lxml":
+        try:
+            import lxml
+        except ImportError:
+            logger.warning("lxml is not installed, falling back to html.parser")
+            return "html.parser"
+    return backend
+
+def parse_page(html, kind=None, backend=None, subtrees=None):
+    """
+    Parse an HTML page, keeping only the subtrees needed for its kind when subtree parsing is enabled.
+    """
+    subtrees = PARSE_SUBTREES if subtrees is None else subtrees
+    strainer = SUBTREES.get(kind) if subtrees else None
+    return BeautifulSoup(html, get_backend(backend), parse_only=strainer)
+
+def select(tag, selectors_key):
+    return COMPILED_SELECTORS[selectors_key].select(tag)
+
+def select_one(tag, selectors_key):
+    return COMPILED_SELECTORS[selectors_key].select_one(tag)
+
+def extract(html, kind, backend=None, subtrees=None):
+    """
+    Run the extraction of a page kind on one parser configuration.
+    """
+    from functions import get_card_infos, parse_job_offers, parse_other_infos
+    soup = parse_page(html, kind, backend, subtrees)
+    if kind == "listing":
+        return [get_card_infos(block) for block in select(soup, 7)]
+    if kind == "jobs":
+        return parse_job_offers(soup)
+    return parse_other_infos(soup, "")
+
+def check_parity(html, kind):
+    """
+    Return the parser configurations whose extraction differs from html.parser on a full tree.
+    """
+    reference = extract(html, kind, "html.parser", False)
+    return [
+        (backend, subtrees)
+        for backend in BACKENDS
+        for subtrees in (False, True)
+        if extract(html, kind, backend, subtrees) != reference
+    ]
+
+if __name__ == "__main__":
+    # Check the parity of every parser configuration on the pages recorded in the page cache
+    import sys
+    from PageCache import PageCache
+
+    cache = PageCache(sys.argv[1] if len(sys.argv) > 1 else CACHE_DIR)
+    pages = cache.conn.execute('SELECT url, kind, digest FROM pages').fetchall()
+    failures = 0
+    for url, kind, digest in pages:
+        html = cache._read(digest)
+        if html is None:
+            continue
+        mismatches = check_parity(html, kind)
+        if mismatches:
+            failures += 1
+            print(f"[!] {url} ({kind}) differs with {mismatches}")
+    print(f"{len(pages)} pages checked, {failures} with differences")
+    sys.exit(1 if failures else 0)
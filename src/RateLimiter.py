@@ -0,0 +1,123 @@
+import asyncio
+import logging
+import threading
+import time
+from urllib.parse import urlparse
+
+from CONST import *
+from Metrics import metrics
+
+logger = logging.getLogger(__name__)
+
+def should_retry(status):
+    """
+    Return True for the statuses telling the client to slow down or try again later.
+    """
+    return status == 429 or status >= 500
+
+def parse_retry_after(value):
+    """
+    Return the delay of a Retry-After header given in seconds, or None.
+    """
+    try:
+        return max(float(value), 0)
+    except (TypeError, ValueError):
+        return None
+
+class TokenBucket:
+    """
+    Bucket refilled with rate tokens per second up to burst tokens, each request taking one.
+    After a throttled response, requests are held back for an exponentially growing delay.
+    """
+    def __init__(self, rate=RATE_LIMIT, burst=RATE_BURST, backoff_base=BACKOFF_BASE, backoff_max=BACKOFF_MAX):
+        self.rate = rate
+        self.burst = burst
+        self.backoff_base = backoff_base
+        self.backoff_max = backoff_max
+        self.tokens = burst
+        self.updated = time.monotonic()
+        self.blocked_until = 0
+        self.failures = 0
+        self.lock = threading.Lock()
+
+    def reserve(self):
+        """
+        Take a token and return the number of seconds to wait before sending the request.
+        """
+        with self.lock:
+            now = time.monotonic()
+            self.tokens = min(self.burst, self.tokens + (now - self.updated) * self.rate)
+            self.updated = now
+            self.tokens -= 1
+            delay = -self.tokens / self.rate if self.tokens < 0 else 0
+            return max(delay, self.blocked_until - now)
+
+    def backoff(self, retry_after=None):
+        """
+        Hold back the next requests, for retry_after seconds when the server gave one. Return the delay.
+        """
+        with self.lock:
+            self.failures += 1
+            delay = retry_after if retry_after is not None else min(self.backoff_base ** self.failures, self.backoff_max)
+            self.blocked_until = max(self.blocked_until, time.monotonic() + delay)
+            return delay
+
+    def success(self):
+        with self.lock:
+            self.failures = 0
+
+class RateLimiter:
+    """
+    One token bucket per host, shared by every request sent to it.
+    """
+    def __init__(self, rate=RATE_LIMIT, burst=RATE_BURST):
+        self.rate = rate
+        self.burst = burst
+        self.buckets = {}
+        self.lock = threading.Lock()
+
+    def bucket(self, url):
+        host = urlparse(url).netloc
+        with self.lock:
+            if host not in self.buckets:
+                self.buckets[host] = TokenBucket(self.rate, self.burst)
+            return self.buckets[host]
+
+    def wait(self, url):
+        """
+        Block until a request to the host of the url may be sent.
+        """
+        delay = self.bucket(url).reserve()
+        if delay > 0:
+            with metrics.timer("sleep"):
+                time.sleep(delay)
+        return delay
+
+    async def wait_async(self, url):
+        delay = self.bucket(url).reserve()
+        if delay > 0:
+            with metrics.timer("sleep"):
+                await asyncio.sleep(delay)
+        return delay
+
+    def backoff(self, url, status=None, retry_after=None):
+        delay = self.bucket(url).backoff(retry_after)
+        metrics.inc("throttled", host=urlparse(url).netloc)
+        logger.warning(f"HTTP {status} from {urlparse(url).netloc}, backing off for {delay:.1f}s")
+        return delay
+
+    def success(self, url):
+        self.bucket(url).success()
+
+class UnlimitedRateLimiter(RateLimiter):
+    """
+    Rate limiter letting every request through at once, for the benchmarks and the local test servers.
+    """
+    def wait(self, url):
+        return 0
+
+    async def wait_async(self, url):
+        return 0
+
+# Rate limiter shared by the WebDriver navigations and the HTTP fetcher
+rate_limiter = RateLimiter()
@@ -0,0 +1,132 @@
+# -*- coding: utf-8 -*-
+import itertools
+import logging
+import queue
+import threading
+from urllib.parse import urlencode, urljoin
+
+from functions import *
+
+logger = logging.getLogger(__name__)
+
+# Task priorities, the lowest first: companies are scraped as soon as their card is found,
+# listing pages before the first page of the next query
+COMPANY = 0
+LISTING = 1
+QUERY = 2
+_STOP = 3
+
+def query_url(query):
+    """
+    Return the first listing page of a query given as a listing URL or as {attribute: [values]} refinements.
+    """
+    if isinstance(query, str):
+        return query
+    refinements = [(f"refinementList[{attribute}][]", value) for attribute, values in query.items() for value in values]
+    return urljoin(MAIN_URL, "fr/companies") + "?page=1&query=&" + urlencode(refinements)
+
+def company_key(url):
+    """
+    Return the URL identifying a company, without its query string.
+    """
+    return url.split("?")[0].rstrip("/")
+
+class Scheduler:
+    """
+    Crawl several listing queries over HTTP with a shared priority queue of tasks.
+    Company URLs found by several queries are only scraped once.
+    """
+    def __init__(self, fetcher, sink, existing_companies=(), workers=SCHEDULER_WORKERS):
+        self.fetcher = fetcher
+        self.sink = sink
+        self.existing_companies = existing_companies
+        self.workers = workers
+        self.tasks = queue.PriorityQueue()
+        # Keeps the insertion order among tasks of the same priority
+        self.counter = itertools.count()
+        self.seen = set()
+        self.lock = threading.Lock()
+
+    def put(self, priority, url, payload=None):
+        self.tasks.put((priority, next(self.counter), url, payload))
+
+    def add_queries(self, queries):
+        for query in queries:
+            self.put(QUERY, query_url(query))
+
+    def run(self):
+        """
+        Process the tasks until the queue is empty, with several worker threads.
+        """
+        threads = [
+            threading.Thread(target=self._work, name=f"scheduler-worker-{index}", daemon=True)
+            for index in range(self.workers)
+        ]
+        for thread in threads:
+            thread.start()
+        self.tasks.join()
+        for _ in threads:
+            self.put(_STOP, None)
+        for thread in threads:
+            thread.join()
+        logger.info(f"[Scheduler] {len(self.seen)} distinct companies found")
+
+    def _work(self):
+        handlers = {QUERY: self._query, LISTING: self._listing, COMPANY: self._company}
+        while True:
+            priority, _, url, payload = self.tasks.get()
+            try:
+                if priority == _STOP:
+                    return
+                handlers[priority](url, payload)
+            except Exception as e:
+                logger.error(f"[Scheduler] Error processing {url} : {e}")
+            finally:
+                self.tasks.task_done()
+
+    def _query(self, url, payload):
+        soup = get_element_by_http(self.fetcher, url, "listing")
+        if soup is None:
+            return
+        number_of_pages = parse_number_of_pages(soup) or 1
+        logger.info(f"[Scheduler] {number_of_pages} listing pages for {url}")
+        for page in get_all_pages_url(url, number_of_pages)[1:]:
+            self.put(LISTING, page)
+        self._add_cards(soup)
+
+    def _listing(self, url, payload):
+        soup = get_element_by_http(self.fetcher, url, "listing")
+        if soup is not None:
+            self._add_cards(soup)
+
+    def _add_cards(self, soup):
+        for block in select(soup, 7):
+            link = get_card_link(block)
+            if not link:
+                continue
+            with self.lock:
+                if company_key(link) in self.seen:
+                    metrics.inc("skips")
+                    continue
+                self.seen.add(company_key(link))
+            self.put(COMPANY, link, block)
+
+    def _company(self, url, block):
+        for infos in get_companys_infos_http(self.fetcher, [block], self.existing_companies):
+            company = construct_company_object(infos)
+            if company:
+                self.sink.put(company)
+
+if __name__ == "__main__":
+    from fetcher import HttpFetcher
+    from KnownCompanies import KnownCompanies
+    from Sink import CompanySink
+
+    setup_logger()
+    known = KnownCompanies(DB_FILE)
+    with HttpFetcher(HTTP_CONCURRENCY, HTTP_TIMEOUT, get_page_cache()) as fetcher, CompanySink(DB_FILE) as sink:
+        scheduler = Scheduler(fetcher, sink, known)
+        scheduler.add_queries(CRAWL_QUERIES)
+        scheduler.run()
+    known.close()
+    logger.info(f"[Scheduler] {sink.written} companies saved to {DB_FILE}")
@@ -0,0 +1,138 @@
+import logging
+import queue
+import sqlite3
+import threading
+import time
+
+from CONST import *
+from Company import connect, create_table, save_offers, UPSERT_SQL
+from Metrics import metrics
+
+logger = logging.getLogger(__name__)
+
+_STOP = object()
+
+class CompanySink:
+    """
+    Writer thread upserting companies in batches with executemany on one SQLite connection.
+    Companies are received through a bounded queue, so the scraper blocks instead of piling them up in memory.
+    """
+    def __init__(self, db, batch_size=SINK_BATCH_SIZE, flush_interval=SINK_FLUSH_INTERVAL, queue_size=SINK_QUEUE_SIZE, on_batch=None, jsonl=None):
+        self.db = db
+        # JsonlStore the companies are appended to once committed
+        self.jsonl = jsonl
+        self.batch_size = batch_size
+        self.flush_interval = flush_interval
+        # Called on the writer thread with (cursor, keys) before each commit, inside the batch transaction
+        self.on_batch = on_batch
+        self.queue = queue.Queue(maxsize=queue_size)
+        self.written = 0
+        self.thread = None
+
+    def start(self):
+        create_table(self.db)
+        self.thread = threading.Thread(target=self._run, name="company-sink", daemon=True)
+        self.thread.start()
+        return self
+
+    def put(self, company, key=None):
+        """
+        Queue a company to be saved. The key is passed to on_batch once the company is written.
+        """
+        self.queue.put((company, key))
+
+    def close(self):
+        """
+        Flush the queued companies and stop the writer thread.
+        """
+        if self.thread is not None:
+            self.queue.put(_STOP)
+            self.thread.join()
+            self.thread = None
+
+    def _run(self):
+        conn = connect(self.db)
+        batch = []
+        deadline = None
+        try:
+            while True:
+                timeout = None if deadline is None else max(deadline - time.monotonic(), 0)
+                try:
+                    item = self.queue.get(timeout=timeout)
+                except queue.Empty:
+                    item = None
+                if item is _STOP:
+                    break
+                if item is not None:
+                    batch.append(item)
+                    if deadline is None:
+                        deadline = time.monotonic() + self.flush_interval
+                if batch and (len(batch) >= self.batch_size or time.monotonic() >= deadline):
+                    self._flush(conn, batch)
+                    batch = []
+                    deadline = None
+            if batch:
+                self._flush(conn, batch)
+        finally:
+            conn.close()
+
+    def _flush(self, conn, batch):
+        try:
+            with metrics.timer("persistence"):
+                saved = self._save_batch(conn, batch)
+        except (sqlite3.Error, TypeError, ValueError) as e:
+            conn.rollback()
+            logger.error(f"[SQLite] Error while saving a batch of {len(batch)} companies, saving them one by one : {e}")
+            try:
+                saved = self._save_one_by_one(conn, batch)
+            except Exception as e:
+                # The batch is dropped but the writer thread keeps running, its frontier items are retried by the next run
+                conn.rollback()
+                logger.error(f"[SQLite] Batch of {len(batch)} companies not saved : {e}")
+                return
+        self.written += len(saved)
+        metrics.inc("companies", len(saved))
+        logger.info(f"[SQLite] {len(saved)} companies saved ({self.written} in total)")
+        if self.jsonl is not None and saved:
+            try:
+                self.jsonl.append_many(company for company, _ in saved)
+            except OSError as e:
+                logger.error(f"[JSONL] Error while appending {len(saved)} companies to {self.jsonl.file} : {e}")
+
+    def _save_batch(self, conn, batch):
+        cursor = conn.cursor()
+        companies = [company for company, _ in batch]
+        cursor.executemany(UPSERT_SQL, [company.to_row() for company in companies])
+        save_offers(cursor, companies)
+        if self.on_batch is not None:
+            self.on_batch(cursor, [key for _, key in batch if key is not None])
+        conn.commit()
+        return batch
+
+    def _save_one_by_one(self, conn, batch):
+        """
+        Save the companies of a failed batch one at a time and return the ones written.
+        Only their keys are passed to on_batch, so the others stay pending.
+        """
+        cursor = conn.cursor()
+        # One transaction for the companies and their keys, as for a whole batch
+        cursor.execute("BEGIN")
+        saved = []
+        for company, key in batch:
+            # A company failing after its upsert leaves no partial row behind
+            cursor.execute("SAVEPOINT company")
+            if company.save_to_sqlite(cursor):
+                saved.append((company, key))
+            else:
+                cursor.execute("ROLLBACK TO company")
+            cursor.execute("RELEASE company")
+        if self.on_batch is not None:
+            self.on_batch(cursor, [key for _, key in saved if key is not None])
+        conn.commit()
+        return saved
+
+    def __enter__(self):
+        return self.start()
+
+    def __exit__(self, *exc):
+        self.close()
@@ -1,37 +1,10 @@
 from datetime import datetime
 
-import json
 import IDS
 from CONST import *
 from functions import *
 from SELECTORS import *
 
-# Function to add a company name to a file (applied or ignored)
-def add_companies_in_file(file, company_name):
-    exist_data = get_companies_list(file) if get_companies_list(file) else []
-
-    with open(file, "w", encoding="utf-8") as f:
-        if company_name not in exist_data:
-            exist_data.append(company_name)
-
-        json.dump(exist_data , f, indent=4, ensure_ascii=False)
-
-# Function to get the list of companies from a file (applied or ignored)
-def get_companies_list(file):
-    try:
-        with open(file, "r", encoding="utf-8") as f:
-            return json.load(f)
-    except (FileNotFoundError, UnicodeDecodeError):
-        # If the file does not exist, create it and return an empty list
-        logger.warning(f"File {file} not found or cannot be read. Creating a new file.")
-        try:
-            with open(file, "w") as f:
-                json.dump([], f)
-        except Exception as e:
-            logger.error(f"An error occurred while creating the file {file}: {e}")
-    with open(file, "w") as f:
-        return []
-
 # Function to write the cover letter to the input field
 def write_cover_letter(element, company):
     try:
@@ -100,49 +73,44 @@ def apply_to_company(driver,company):
     logger.info(f"Application successfully submitted for {company.name}.")
     return True
 
-if __name__ == "__main__":
-
-    # Initialize the WebDriver
-    driver = init_driver()
-
-    # Connect to the application
-    connect(driver)
+def run(db=DB_FILE):
+    """
+    Apply to the companies of the DB not applied to nor ignored yet, and return the number of applied and ignored ones.
+    """
+    from ApplyEngine import ApplyEngine
+    from Applications import Applications
 
     # Get all companies from the JSON file and filter them
     cps = Companies([])
-    
-    # data = cps.get_companies_from_json(JSON_FILE).companies
-    data = cps.get_companies_from_sqlite(DB_FILE).companies
-    if not data:
-        logger.error("No companies found in the DB file.")
-        exit(1)
 
-    # Get the list of applied and ignored companies
-    applied_companies = get_companies_list(APPLIED)
-    ignored_companies = get_companies_list(IGNORED)
+    # The applied and ignored companies are kept in the applications table, the old JSON lists are imported once
+    applications = Applications(db)
+    applications.import_lists(APPLIED, IGNORED)
+    # Companies claimed by workers stopped before recording the outcome are candidates again
+    applications.release_stale_claims()
 
-    # Filter companies based on location, spontaneity, and domain
-    filtered_companies = [c for c in data if c.spontane == "Yes"
-                            and c.name not in applied_companies + ignored_companies]
+    # Select the companies accepting spontaneous applications not applied to nor ignored yet
+    # data = cps.get_companies_from_json(JSON_FILE).companies
+    filtered_companies = cps.get_candidates_from_sqlite(db, exclude_applications=True).companies
     
     print(len(filtered_companies))
     # Check if there are companies to apply to
     if not filtered_companies:
         logger.info("No companies found to apply to.")
-        driver.quit()
-        exit(0)
-
-    # Apply to each company
-    for company in filtered_companies:
-        # # Apply to the company and check for success
-        if not apply_to_company(driver, company):
-            add_companies_in_file(IGNORED, company.name)
-            logger.info(f"Application failed for {company.name}.")
-            print(f"Application failed for {company.name}.")
-        else:
-            add_companies_in_file(APPLIED, company.name)
-            logger.info(f"Application succeeded for {company.name}.")
-            print(f"Application succeeded for {company.name}.")
+        applications.close()
+        return {}
+
+    # Log in once and apply with APPLY_WORKERS drivers sharing the session, at most APPLY_RATE_PER_HOUR per hour
+    engine = ApplyEngine(applications)
+    try:
+        outcomes = engine.run(filtered_companies)
+        print(f"Applications : {outcomes}")
+    finally:
+        engine.close()
+        applications.close()
+    return outcomes
 
-    driver.quit()
+if __name__ == "__main__":
+    setup_logger()
+    run()
     # End of the script
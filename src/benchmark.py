@@ -0,0 +1,341 @@
+# -*- coding: utf-8 -*-
+"""
+Offline benchmarks of the scraper, run on HTML fixture pages without network or browser.
+
+    python src/benchmark.py --output bench.json
+    python src/benchmark.py --fixtures path/to/recorded/pages --sizes 1000 10000
+    python src/benchmark.py --browser 20
+    python src/benchmark.py --startup
+
+The fixtures directory must contain listing.html, jobs.html and showcase.html.
+Without it, generated pages matching the selectors of SELECTORS.py are used.
+"""
+import argparse
+import json
+import os
+import platform
+import subprocess
+import sys
+import tempfile
+import time
+import tracemalloc
+from datetime import datetime
+
+import functions
+from functions import *
+from Parser import check_parity
+from CompanyTable import CompanyTable
+from RateLimiter import UnlimitedRateLimiter
+
+FIXTURE_KINDS = ("listing", "jobs", "showcase")
+
+def make_fixtures(cards=30, jobs=12):
+    """
+    Generate a listing, a jobs and a showcase page shaped like the real ones.
+    """
+    card = (
+        '<article data-role="companies:thumb" data-testid="company-card">'
+        '<div><img src="/logo-{i}.png"><header><a href="/fr/companies/company-{i}?q=1"><span>Company {i}</span></a></header></div>'
+        '<ul><li>Logiciels</li><li>SaaS / Cloud Services</li><li>Paris</li><li>{i}0 salariés</li></ul>'
+        '<footer><a href="/fr/companies/company-{i}/jobs"><span>{i} offres</span></a></footer>'
+        '</article>'
+    )
+    pagination = ''.join(f'<li><a href="?page={i}">{i}</a></li>' for i in range(1, 8))
+    listing = (
+        '<html><head><title>Companies</title><script>window.__DATA__ = {}</script></head><body><main>'
+        '<div class="filters">' + '<div><span><input type="checkbox"></span></div>' * 40 + '</div>'
+        + ''.join(card.format(i=i) for i in range(cards))
+        + f'<div data-testid="companies-search-pagination"><nav><ul>{pagination}</ul></nav></div>'
+        '</main><footer>' + '<a href="/x">link</a>' * 50 + '</footer></body></html>'
+    )
+    job = '<div><div><a href="/jobs/{i}"><h2>Job offer {i}</h2></a><p>CDI - Paris</p></div></div>'
+    jobs_page = (
+        '<html><body><main>' + ''.join(job.format(i=i) for i in range(jobs))
+        + '<button class="kOnLvx">Candidature spontanée</button></main></body></html>'
+    )
+    sections = [("Collaborateurs", "120"), ("Âge moyen", "31 ans"), ("Année de création", "2015"), ("Parité", "40% / 60%")]
+    showcase = (
+        '<html><body><main><a class="sc-bFQvPF" href="https://company.example">Site web</a>'
+        '<div class="dyNymF">' + ''.join(f'<section><p>{title}</p><span>{value}</span></section>' for title, value in sections)
+        + '</div>' + '<p>About the company.</p>' * 60 + '</main></body></html>'
+    )
+    return {"listing": listing, "jobs": jobs_page, "showcase": showcase}
+
+def load_fixtures(directory):
+    fixtures = {}
+    for kind in FIXTURE_KINDS:
+        with open(os.path.join(directory, f"{kind}.html"), "r", encoding="utf-8") as f:
+            fixtures[kind] = f.read()
+    return fixtures
+
+class FixtureDriver:
+    """
+    Stand-in for a WebDriver serving the fixture page matching each URL.
+    """
+    def __init__(self, fixtures):
+        self.fixtures = fixtures
+        self.current_url = None
+        self.page_source = ""
+
+    def get(self, url):
+        self.current_url = url
+        if url.rstrip("/").endswith("/jobs"):
+            self.page_source = self.fixtures["jobs"]
+        elif "page=" in url:
+            self.page_source = self.fixtures["listing"]
+        else:
+            self.page_source = self.fixtures["showcase"]
+
+    def find_element(self, by, selector):
+        return True
+
+    def find_elements(self, by, selector):
+        return [True]
+
+def throughput(function, seconds=2.0):
+    """
+    Call a function repeatedly for about the given time and return the calls per second.
+    """
+    calls = 0
+    start = time.perf_counter()
+    while True:
+        function()
+        calls += 1
+        elapsed = time.perf_counter() - start
+        if elapsed >= seconds:
+            return round(calls / elapsed, 2)
+
+def bench_parsing(fixtures, seconds):
+    driver = FixtureDriver(fixtures)
+    listing_url = "https://www.welcometothejungle.com/fr/companies?page=1"
+    blocks = get_companys_blocks(driver, listing_url)
+    showcase_url = urljoin(MAIN_URL, "fr/companies/company-1")
+    return {
+        "get_companys_blocks_pages_per_s": throughput(lambda: get_companys_blocks(driver, listing_url), seconds),
+        # One company means three pages: its card, its jobs page and its showcase page
+        "get_companys_infos_companies_per_s": throughput(lambda: get_companys_infos(driver, blocks[0]), seconds),
+        "get_other_infos_pages_per_s": throughput(lambda: get_other_infos(driver, showcase_url), seconds),
+        "cards_per_listing_page": len(blocks),
+    }
+
+def bench_construct(fixtures, seconds):
+    driver = FixtureDriver(fixtures)
+    blocks = get_companys_blocks(driver, "https://www.welcometothejungle.com/fr/companies?page=1")
+    all_infos = [get_companys_infos(driver, block) for block in blocks]
+    def construct_all():
+        for infos in all_infos:
+            construct_company_object(infos)
+    return {"construct_company_object_per_s": round(throughput(construct_all, seconds) * len(all_infos), 2)}
+
+def make_companies(count):
+    return Companies([
+        Company(
+            f"Company {i}", f"https://www.welcometothejungle.com/fr/companies/company-{i}", f"https://company-{i}.example",
+            "Logiciels", "Paris", 10 + i % 500, 25 + i % 20, i % 30,
+            [f"Job offer {j}" for j in range(i % 5)], "Yes" if i % 3 else "No",
+        ) for i in range(count)
+    ])
+
+def bench_sqlite(sizes):
+    results = {}
+    with tempfile.TemporaryDirectory() as directory:
+        for size in sizes:
+            companies = make_companies(size)
+            db = os.path.join(directory, f"bench-{size}.db")
+            start = time.perf_counter()
+            companies.save_companies_to_sqlite(db)
+            insert = time.perf_counter() - start
+            # Saving the same companies again measures the ON CONFLICT update path
+            start = time.perf_counter()
+            companies.save_companies_to_sqlite(db)
+            update = time.perf_counter() - start
+            results[str(size)] = {
+                "insert_rows_per_s": round(size / insert, 2),
+                "update_rows_per_s": round(size / update, 2),
+            }
+    return results
+
+class DictCompany(Company):
+    """
+    Company with a per-instance __dict__, as the class was before it used __slots__.
+    """
+
+def make_company_lines(count):
+    return [
+        json.dumps([
+            f"Company {i}", f"https://www.welcometothejungle.com/fr/companies/company-{i}", f"https://company-{i}.example",
+            ("Logiciels", "SaaS / Cloud Services", "Banque")[i % 3], ("Paris", "Lyon", "Nantes", "Lille")[i % 4],
+            10 + i % 500, 25 + i % 20, i % 30, [f"Job offer {j}" for j in range(i % 5)], "Yes" if i % 3 else "No",
+        ]) for i in range(count)
+    ]
+
+def measure_memory(build):
+    tracemalloc.start()
+    value = build()
+    size = tracemalloc.get_traced_memory()[0]
+    tracemalloc.stop()
+    del value
+    return size
+
+def bench_memory(count):
+    # Each company is decoded from its own JSON line, so repeated values are distinct strings as when read from the DB
+    lines = make_company_lines(count)
+    sizes = {
+        "dict_company_list": measure_memory(lambda: [DictCompany(*json.loads(line)) for line in lines]),
+        "slotted_company_list": measure_memory(lambda: [Company(*json.loads(line)) for line in lines]),
+        "company_table": measure_memory(lambda: CompanyTable().extend(Company(*json.loads(line)) for line in lines)),
+    }
+    table = CompanyTable().extend(Company(*json.loads(line)) for line in lines)
+    companies = [Company(*json.loads(line)) for line in lines]
+    return {
+        "companies": count,
+        "bytes_per_company": {name: round(size / count, 1) for name, size in sizes.items()},
+        "filter_location_spontaneous_per_s": {
+            "company_list": throughput(lambda: [c for c in companies if c.location == "Paris" and c.spontane == "Yes"], 0.5),
+            "company_table": throughput(lambda: table.where(location="Paris", spontane="Yes"), 0.5),
+        },
+    }
+
+def driver_rss(driver):
+    """
+    Return the resident memory in bytes of the driver and the browser processes it started, or None without psutil.
+    """
+    try:
+        import psutil
+    except ImportError:
+        return None
+    try:
+        process = psutil.Process(driver.service.process.pid)
+        return sum(p.memory_info().rss for p in [process] + process.children(recursive=True))
+    except (psutil.Error, AttributeError):
+        return None
+
+def bench_browser(pages, opt=""):
+    """
+    Load real listing pages with the default and the fast browser profiles, measuring pages per minute and peak RSS.
+    """
+    urls = get_all_pages_url(MAIN_TECH_PAGE_URL, pages)
+    results = {}
+    for profile in ("default", "fast"):
+        driver = init_driver(opt, profile)
+        if not driver:
+            results[profile] = None
+            continue
+        try:
+            rss = []
+            start = time.perf_counter()
+            for url in urls:
+                driver.get(url)
+                driver.page_source
+                rss.append(driver_rss(driver))
+            elapsed = time.perf_counter() - start
+        finally:
+            driver.quit()
+        results[profile] = {
+            "pages_per_minute": round(len(urls) / elapsed * 60, 2),
+            "peak_rss_bytes": max(rss) if None not in rss else None,
+        }
+    return results
+
+# Data commands of cli.py timed by bench_startup, {db} and {directory} being replaced by a temporary DB and directory
+STARTUP_COMMANDS = {
+    "stats": ["stats", "--db", "{db}"],
+    "query": ["query", "--db", "{db}", "--location", "Paris", "--spontaneous", "Yes", "--limit", "100"],
+    "export_csv": ["export", "--db", "{db}", "--format", "csv", "--output", "{directory}/companies.csv.gz"],
+}
+# Modules the data commands must not import
+HEAVY_MODULES = ("selenium", "bs4", "lxml", "aiohttp", "pyarrow")
+
+# Run in a fresh interpreter: times the imports and the run of a command, leaving out the startup of the interpreter itself
+STARTUP_SCRIPT = """
+import contextlib, io, json, sys, time
+start = time.perf_counter()
+import cli
+with contextlib.redirect_stdout(io.StringIO()):
+    cli.main({argv!r})
+elapsed = time.perf_counter() - start
+print(json.dumps({{"ms": elapsed * 1000, "heavy": [name for name in {heavy!r} if name in sys.modules]}}))
+"""
+
+def bench_startup(runs=5, budget=STARTUP_BUDGET_MS):
+    """
+    Return the median time of the data commands of cli.py over several fresh interpreters, checked against the budget.
+    """
+    src = os.path.dirname(os.path.abspath(__file__))
+    commands = {}
+    with tempfile.TemporaryDirectory() as directory:
+        db = os.path.join(directory, "startup.db")
+        make_companies(1000).save_companies_to_sqlite(db)
+        for name, argv in STARTUP_COMMANDS.items():
+            argv = [arg.format(db=db, directory=directory) for arg in argv]
+            times, heavy = [], set()
+            for _ in range(runs):
+                output = subprocess.run(
+                    [sys.executable, "-c", STARTUP_SCRIPT.format(argv=argv, heavy=HEAVY_MODULES)],
+                    cwd=src, capture_output=True, text=True, check=True,
+                ).stdout
+                result = json.loads(output.splitlines()[-1])
+                times.append(result["ms"])
+                heavy.update(result["heavy"])
+            median = sorted(times)[len(times) // 2]
+            commands[name] = {
+                "median_ms": round(median, 1),
+                "heavy_modules": sorted(heavy),
+                "within_budget": median <= budget and not heavy,
+            }
+    return {"budget_ms": budget, "commands": commands, "ok": all(command["within_budget"] for command in commands.values())}
+
+def git_commit():
+    try:
+        return subprocess.run(
+            ["git", "rev-parse", "--short", "HEAD"], capture_output=True, text=True, check=True,
+            cwd=os.path.dirname(os.path.abspath(__file__)),
+        ).stdout.strip()
+    except Exception:
+        return None
+
+def run(fixtures, sizes, seconds, memory_size):
+    # Benchmarks measure the parsing, never pages served from the page cache nor the pacing of the rate limiter
+    functions.CACHE_ENABLED = False
+    functions.rate_limiter = UnlimitedRateLimiter()
+    return {
+        "date": datetime.now().isoformat(timespec="seconds"),
+        "commit": git_commit(),
+        "python": platform.python_version(),
+        "parser_backend": PARSER_BACKEND,
+        "parse_subtrees": PARSE_SUBTREES,
+        "parser_parity": {kind: not check_parity(html, kind) for kind, html in fixtures.items()},
+        "parsing": bench_parsing(fixtures, seconds),
+        "construct": bench_construct(fixtures, seconds),
+        "sqlite_upsert": bench_sqlite(sizes),
+        "memory": bench_memory(memory_size),
+    }
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Offline benchmarks of the scraper.")
+    parser.add_argument("--fixtures", help="directory with listing.html, jobs.html and showcase.html")
+    parser.add_argument("--sizes", type=int, nargs="+", default=[1000, 10000, 100000], help="numbers of companies for the SQLite benchmark")
+    parser.add_argument("--memory-size", type=int, default=100000, help="number of companies for the memory benchmark")
+    parser.add_argument("--seconds", type=float, default=2.0, help="duration of each throughput measure")
+    parser.add_argument("--output", help="JSON file to write the results to, printed when omitted")
+    parser.add_argument("--browser", type=int, metavar="PAGES", help="also load this number of real listing pages with each browser profile")
+    parser.add_argument("--firefox", action="store_true", help="use Firefox for the browser benchmark")
+    parser.add_argument("--startup", action="store_true", help="only time the data commands of cli.py, exit with status 1 above STARTUP_BUDGET_MS")
+    args = parser.parse_args()
+
+    logging.disable(logging.CRITICAL)
+    if args.startup:
+        results = bench_startup()
+        json.dump(results, sys.stdout, ensure_ascii=False, indent=4)
+        print()
+        sys.exit(0 if results["ok"] else 1)
+    fixtures = load_fixtures(args.fixtures) if args.fixtures else make_fixtures()
+    results = run(fixtures, args.sizes, args.seconds, args.memory_size)
+    if args.browser:
+        results["browser"] = bench_browser(args.browser, "a" if args.firefox else "")
+    if args.output:
+        with open(args.output, "w", encoding="utf-8") as f:
+            json.dump(results, f, ensure_ascii=False, indent=4)
+    else:
+        json.dump(results, sys.stdout, ensure_ascii=False, indent=4)
+        print()
@@ -0,0 +1,169 @@
+# -*- coding: utf-8 -*-
+"""
+Single entry point of the scraper, one subcommand per task.
+
+    python src/cli.py crawl
+    python src/cli.py apply
+    python src/cli.py export --format csv
+    python src/cli.py query --location Paris --spontaneous Yes --columns name url --limit 20
+    python src/cli.py stats
+
+Each command imports the modules it needs when it runs: Selenium and the HTML parsers are only loaded by crawl and apply,
+so export, query and stats start within STARTUP_BUDGET_MS, checked by benchmark.py --startup.
+"""
+import argparse
+import json
+import logging
+import os
+import sys
+import time
+
+from CONST import *
+
+# Company attribute holding each column of the companies table
+ATTRIBUTES = {
+    "name": "name",
+    "url": "url_wtj",
+    "web_site": "url_web_site",
+    "domain": "domain",
+    "location": "location",
+    "number_of_salaries": "number_of_salaries",
+    "average_age": "avg_age",
+    "offers": "offers",
+    "all_offers": "all_offers",
+    "spontaneous_application": "spontane",
+}
+
+# Formats of export.FORMATS, repeated so that building the parser imports no module
+EXPORT_FORMATS = ("parquet", "arrow", "csv")
+
+def db_exists(db):
+    """
+    Tell the read commands to stop when the DB does not exist, instead of creating it.
+    """
+    if os.path.exists(db):
+        return True
+    print(f"{db} does not exist, run the crawl first.", file=sys.stderr)
+    return False
+
+def run_crawl(args):
+    from functions import setup_logger
+    import main
+
+    os.makedirs("log", exist_ok=True)
+    os.makedirs("data", exist_ok=True)
+    setup_logger()
+    main.main()
+
+def run_apply(args):
+    from functions import setup_logger
+    import apply
+
+    setup_logger()
+    apply.run(args.db)
+
+def run_export(args):
+    from export import export
+
+    if not db_exists(args.db):
+        return 1
+    logging.basicConfig(level=logging.INFO, format="%(message)s")
+    export(args.db, args.format, args.output, args.compression, args.chunk_size)
+
+def run_query(args):
+    """
+    Print the companies matching the filters as JSON lines, with the selected columns.
+    """
+    from Companies import Companies
+
+    if not db_exists(args.db):
+        return 1
+    filters = {}
+    if args.location:
+        filters["location"] = args.location
+    if args.domain:
+        filters["domain"] = args.domain
+    if args.spontaneous:
+        filters["spontaneous_application"] = args.spontaneous
+    columns = args.columns or list(ATTRIBUTES)
+    companies = Companies([]).iter_companies_from_sqlite(args.db, columns=columns, **filters)
+    for index, company in enumerate(companies):
+        if args.limit is not None and index >= args.limit:
+            companies.close()
+            break
+        print(json.dumps({column: getattr(company, ATTRIBUTES[column]) for column in columns}, ensure_ascii=False))
+
+def run_stats(args):
+    """
+    Print the number of companies, offers, crawl frontier items and applications of the DB, and the metrics of the last run.
+    """
+    from Company import connect_read_only
+
+    if not db_exists(args.db):
+        return 1
+    # Read only: the tables missing from an older DB are counted as empty, never created nor migrated
+    conn = connect_read_only(args.db)
+    try:
+        tables = {name for name, in conn.execute("SELECT name FROM sqlite_master WHERE type = 'table'")}
+        counts = {
+            table: conn.execute(f"SELECT COUNT(*) FROM {table}").fetchone()[0] if table in tables else 0
+            for table in ("companies", "offers")
+        }
+        counts["frontier"] = {}
+        if "frontier" in tables:
+            rows = conn.execute("SELECT kind, state, COUNT(*) FROM frontier GROUP BY kind, state ORDER BY kind, state")
+            counts["frontier"] = {f"{kind}/{state}": count for kind, state, count in rows}
+        counts["applications"] = {}
+        if "applications" in tables:
+            counts["applications"] = dict(conn.execute("SELECT status, COUNT(*) FROM applications GROUP BY status"))
+            # Claims of stopped workers, released by the next apply run
+            counts["applications"]["stale_claims"] = conn.execute(
+                "SELECT COUNT(*) FROM applications WHERE status = 'claimed' AND updated_at < ?",
+                (time.time() - APPLY_CLAIM_TIMEOUT,)
+            ).fetchone()[0]
+    finally:
+        conn.close()
+
+    if os.path.exists(METRICS_SUMMARY_FILE):
+        with open(METRICS_SUMMARY_FILE, "r", encoding="utf-8") as f:
+            counts["last_run"] = json.load(f)
+    print(json.dumps(counts, ensure_ascii=False, indent=4))
+
+def build_parser():
+    parser = argparse.ArgumentParser(description="Scrape companies, apply to them and query the results.")
+    commands = parser.add_subparsers(dest="command", required=True)
+
+    commands.add_parser("crawl", help="scrape the companies of the search, see main.py").set_defaults(func=run_crawl)
+
+    command = commands.add_parser("apply", help="apply to the companies accepting spontaneous applications")
+    command.add_argument("--db", default=DB_FILE, help="SQLite DB of the companies and applications")
+    command.set_defaults(func=run_apply)
+
+    command = commands.add_parser("export", help="export the companies of the DB, see export.py")
+    command.add_argument("--format", choices=EXPORT_FORMATS, default="parquet", help="output format")
+    command.add_argument("--compression", choices=("gzip", "zstd", "none"), help="gzip by default for CSV, zstd for Parquet and Arrow")
+    command.add_argument("--db", default=DB_FILE, help="SQLite DB to export")
+    command.add_argument("--output", help="output file, data/companies.<format> by default")
+    command.add_argument("--chunk-size", type=int, default=EXPORT_CHUNK_SIZE, help="rows read and written at a time")
+    command.set_defaults(func=run_export)
+
+    command = commands.add_parser("query", help="print the companies matching filters as JSON lines")
+    command.add_argument("--db", default=DB_FILE, help="SQLite DB to query")
+    command.add_argument("--location", nargs="+", help="locations, any of them matching")
+    command.add_argument("--domain", nargs="+", help="domains, any of them matching")
+    command.add_argument("--spontaneous", help="spontaneous application flag, e.g. Yes")
+    command.add_argument("--columns", nargs="+", choices=list(ATTRIBUTES), help="columns printed, all of them by default")
+    command.add_argument("--limit", type=int, help="maximum number of companies printed")
+    command.set_defaults(func=run_query)
+
+    command = commands.add_parser("stats", help="print the counts of the DB and the metrics of the last run")
+    command.add_argument("--db", default=DB_FILE, help="SQLite DB to describe")
+    command.set_defaults(func=run_stats)
+    return parser
+
+def main(argv=None):
+    args = build_parser().parse_args(argv)
+    return args.func(args) or 0
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,143 @@
+# -*- coding: utf-8 -*-
+"""
+Export the companies table of the SQLite DB without a browser, streamed in chunks so memory stays constant.
+
+    python src/export.py --format parquet
+    python src/export.py --format csv --compression zstd --output data/companies.csv.zst
+
+Parquet and Arrow need pyarrow, zstd-compressed CSV needs zstandard.
+"""
+import argparse
+import csv
+import gzip
+import io
+import json
+import logging
+
+from CONST import *
+from Company import connect_read_only, offer_titles
+from Companies import COLUMNS
+
+logger = logging.getLogger(__name__)
+
+FORMATS = ("parquet", "arrow", "csv")
+INT_COLUMNS = ("number_of_salaries", "average_age", "offers")
+EXTENSIONS = {"parquet": ".parquet", "arrow": ".arrow", "csv": ".csv"}
+CSV_EXTENSIONS = {"gzip": ".gz", "zstd": ".zst", "none": ""}
+
+def iter_chunks(db, chunk_size=EXPORT_CHUNK_SIZE):
+    """
+    Yield the rows of the companies table as lists of at most chunk_size tuples, in the order of COLUMNS.
+    """
+    conn = connect_read_only(db)
+    try:
+        cursor = conn.execute(f"SELECT {', '.join(COLUMNS)} FROM companies ORDER BY id")
+        while True:
+            rows = cursor.fetchmany(chunk_size)
+            if not rows:
+                break
+            yield rows
+    finally:
+        conn.close()
+
+def typed_columns(rows):
+    """
+    Turn a chunk of rows into typed columns: integers or None, and the offers as a list of titles.
+    """
+    columns = {column: list(values) for column, values in zip(COLUMNS, zip(*rows))}
+    for column in INT_COLUMNS:
+        columns[column] = [value if isinstance(value, int) else None for value in columns[column]]
+    columns["all_offers"] = [offer_titles(value) for value in columns["all_offers"]]
+    return columns
+
+def arrow_schema(pa):
+    return pa.schema([
+        (column, pa.int64() if column in INT_COLUMNS else pa.list_(pa.string()) if column == "all_offers" else pa.string())
+        for column in COLUMNS
+    ])
+
+def export_arrow(db, output, file_format="parquet", compression="zstd", chunk_size=EXPORT_CHUNK_SIZE):
+    """
+    Write the companies to a Parquet or Arrow IPC file, one record batch per chunk.
+    """
+    try:
+        import pyarrow as pa
+        import pyarrow.parquet as pq
+    except ImportError:
+        raise RuntimeError("pyarrow is required for the Parquet and Arrow exports: pip install pyarrow")
+    schema = arrow_schema(pa)
+    compression = None if compression == "none" else compression
+    if file_format == "parquet":
+        writer = pq.ParquetWriter(output, schema, compression=compression or "none")
+    else:
+        # Arrow IPC files only support the zstd and lz4 buffer compressions
+        options = pa.ipc.IpcWriteOptions(compression=compression if compression in ("zstd", "lz4") else None)
+        writer = pa.ipc.new_file(output, schema, options=options)
+    rows = 0
+    try:
+        for chunk in iter_chunks(db, chunk_size):
+            writer.write_batch(pa.record_batch(typed_columns(chunk), schema=schema))
+            rows += len(chunk)
+    finally:
+        writer.close()
+    return rows
+
+def open_compressed(output, compression):
+    """
+    Open a text file compressed with gzip or zstd, or not compressed.
+    """
+    if compression == "gzip":
+        return gzip.open(output, "wt", encoding="utf-8", newline="")
+    if compression == "zstd":
+        try:
+            import zstandard
+        except ImportError:
+            raise RuntimeError("zstandard is required for the zstd-compressed CSV export: pip install zstandard")
+        return io.TextIOWrapper(zstandard.ZstdCompressor().stream_writer(open(output, "wb")), encoding="utf-8", newline="")
+    return open(output, "w", encoding="utf-8", newline="")
+
+def export_csv(db, output, compression="gzip", chunk_size=EXPORT_CHUNK_SIZE):
+    """
+    Write the companies to a CSV file with csv.writer, the offers being a JSON list of titles.
+    """
+    rows = 0
+    with open_compressed(output, compression) as f:
+        writer = csv.writer(f)
+        writer.writerow(COLUMNS)
+        for chunk in iter_chunks(db, chunk_size):
+            columns = typed_columns(chunk)
+            columns["all_offers"] = [json.dumps(titles, ensure_ascii=False) for titles in columns["all_offers"]]
+            writer.writerows(zip(*columns.values()))
+            rows += len(chunk)
+    return rows
+
+def export(db, file_format, output=None, compression=None, chunk_size=EXPORT_CHUNK_SIZE):
+    """
+    Export the companies of the DB to the given format and return the number of rows written.
+    """
+    if file_format not in FORMATS:
+        raise ValueError(f"Unknown export format: {file_format}")
+    if compression is None:
+        compression = "gzip" if file_format == "csv" else "zstd"
+    if output is None:
+        output = f"data/companies{EXTENSIONS[file_format]}"
+        if file_format == "csv":
+            output += CSV_EXTENSIONS[compression]
+    if file_format == "csv":
+        rows = export_csv(db, output, compression, chunk_size)
+    else:
+        rows = export_arrow(db, output, file_format, compression, chunk_size)
+    logger.info(f"{rows} companies exported from {db} to {output}")
+    return rows
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Export the companies of the SQLite DB.")
+    parser.add_argument("--format", choices=FORMATS, default="parquet", help="output format")
+    parser.add_argument("--compression", choices=("gzip", "zstd", "none"), help="gzip by default for CSV, zstd for Parquet and Arrow")
+    parser.add_argument("--db", default=DB_FILE, help="SQLite DB to export")
+    parser.add_argument("--output", help="output file, data/companies.<format> by default")
+    parser.add_argument("--chunk-size", type=int, default=EXPORT_CHUNK_SIZE, help="rows read and written at a time")
+    args = parser.parse_args()
+
+    logging.basicConfig(level=logging.INFO, format="%(message)s")
+    export(args.db, args.format, args.output, args.compression, args.chunk_size)
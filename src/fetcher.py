@@ -0,0 +1,121 @@
+# -*- coding: utf-8 -*-
+import asyncio
+import logging
+import threading
+
+import aiohttp
+
+from CONST import *
+from RateLimiter import rate_limiter, should_retry, parse_retry_after
+
+logger = logging.getLogger(__name__)
+
+HEADERS = {
+    "User-Agent": "Mozilla/5.0 (X11; Linux x86_64) AppleWebKit/537.36 (KHTML, like Gecko) Chrome/124.0 Safari/537.36",
+    "Accept": "text/html,application/xhtml+xml,application/xml;q=0.9,*/*;q=0.8",
+    "Accept-Language": "fr-FR,fr;q=0.9,en;q=0.8",
+}
+
+class HttpFetcher:
+    """
+    Fetch pages concurrently with one pooled aiohttp session.
+    The event loop runs in a background thread so the fetcher can be used from synchronous code.
+    """
+    def __init__(self, concurrency=HTTP_CONCURRENCY, timeout=HTTP_TIMEOUT, cache=None, limiter=rate_limiter, retries=HTTP_RETRIES):
+        self.concurrency = concurrency
+        self.timeout = timeout
+        # Requests are paced per host by the limiter, and retried after a backoff on 429 and 5xx responses
+        self.limiter = limiter
+        self.retries = retries
+        # Optional PageCache, used for the pages fetched with a kind
+        self.cache = cache
+        self.loop = asyncio.new_event_loop()
+        self.thread = threading.Thread(target=self.loop.run_forever, name="http-fetcher", daemon=True)
+        self.thread.start()
+        self.session = self._run(self._open_session())
+        self.semaphore = asyncio.Semaphore(concurrency)
+
+    def _run(self, coroutine):
+        return asyncio.run_coroutine_threadsafe(coroutine, self.loop).result()
+
+    async def _open_session(self):
+        connector = aiohttp.TCPConnector(limit=self.concurrency, ttl_dns_cache=300)
+        return aiohttp.ClientSession(
+            connector=connector,
+            headers=HEADERS,
+            timeout=aiohttp.ClientTimeout(total=self.timeout),
+        )
+
+    async def _fetch(self, url, kind=None):
+        entry = self.cache.lookup(url, kind) if self.cache is not None and kind else None
+        if entry is not None and entry[1]:
+            self.cache.record(True)
+            return url, entry[0]
+        # A stale cached page is revalidated with its validators instead of being downloaded again
+        headers = {}
+        if entry is not None:
+            if entry[2]:
+                headers["If-None-Match"] = entry[2]
+            if entry[3]:
+                headers["If-Modified-Since"] = entry[3]
+        async with self.semaphore:
+            for attempt in range(self.retries + 1):
+                if self.limiter is not None:
+                    await self.limiter.wait_async(url)
+                try:
+                    async with self.session.get(url, headers=headers) as response:
+                        if should_retry(response.status) and attempt < self.retries and self.limiter is not None:
+                            self.limiter.backoff(url, response.status, parse_retry_after(response.headers.get("Retry-After")))
+                            continue
+                        # A throttled last attempt keeps the failures of the host, so the next requests still back off
+                        if self.limiter is not None and not should_retry(response.status):
+                            self.limiter.success(url)
+                        if response.status == 304 and entry is not None:
+                            self.cache.touch(url)
+                            return url, entry[0]
+                        if response.status != 200:
+                            logger.error(f"HTTP {response.status} while fetching {url}")
+                            return url, None
+                        html = await response.text()
+                        break
+                except Exception as e:
+                    logger.error(f"[!] Error fetching {url} : {e}")
+                    return url, None
+        if self.cache is not None and kind:
+            self.cache.record(False)
+            self.cache.put(url, kind, html, response.headers.get("ETag"), response.headers.get("Last-Modified"))
+        return url, html
+
+    async def _fetch_many(self, urls, kinds):
+        results = await asyncio.gather(*(self._fetch(url, kinds.get(url)) for url in urls))
+        return dict(results)
+
+    def fetch(self, url, kind=None):
+        """
+        Fetch one page and return its HTML, or None on failure.
+        """
+        return self._run(self._fetch(url, kind))[1]
+
+    def fetch_many(self, urls, kinds=None):
+        """
+        Fetch several pages concurrently and return a {url: html} dict.
+        kinds maps URLs to their page kind ("listing", "jobs" or "showcase") for the cache.
+        """
+        return self._run(self._fetch_many(list(dict.fromkeys(urls)), kinds or {}))
+
+    def close(self):
+        """
+        Close the HTTP session and stop the event loop.
+        """
+        try:
+            self._run(self.session.close())
+        finally:
+            self.loop.call_soon_threadsafe(self.loop.stop)
+            self.thread.join()
+            self.loop.close()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        self.close()
@@ -1,5 +1,4 @@
 # -*- coding: utf-8 -*-
-from bs4 import BeautifulSoup
 
 from selenium import webdriver
 from selenium.webdriver.common.by import By
@@ -8,16 +7,23 @@ from selenium.webdriver.support.wait import WebDriverWait
 
 import time
 import logging
+import threading
+from collections import deque
 
 from SELECTORS import *
 from CONST import *
 from Company import Company
 from Companies import Companies
+from PageCache import PageCache
+from Parser import parse_page, select, select_one
+from Metrics import metrics
+from RateLimiter import rate_limiter
 
 # Logger setup
 def setup_logger():
     """
-    Set up and return a logger instance.
+    Set up the logging of a run and return the logger of this module.
+    Called by the entry points, so importing this module leaves the logging configuration untouched.
     """
     try:
         logging.basicConfig(
@@ -33,17 +39,54 @@ def setup_logger():
         )
     return logging.getLogger(__name__)
 
-logger = setup_logger()
+logger = logging.getLogger(__name__)
 
-def init_driver( opt = ""):
+def chrome_options(profile=BROWSER_PROFILE):
     """
-    Initialize and return a Chrome WebDriver.
+    Return the Chrome options of a browser profile: "fast" runs headless, without images, media and fonts.
     """
     options = webdriver.ChromeOptions()
+    if profile == "fast":
+        options.add_argument("--headless=new")
+        options.add_argument("--blink-settings=imagesEnabled=false")
+        options.add_experimental_option("prefs", {"profile.managed_default_content_settings.images": 2})
+        # Return once the DOM is ready, without waiting for the remaining resources
+        options.page_load_strategy = "eager"
+    return options
+
+def firefox_options(profile=BROWSER_PROFILE):
+    """
+    Return the Firefox options of a browser profile: "fast" runs headless, without images, media and fonts.
+    """
+    options = webdriver.FirefoxOptions()
+    if profile == "fast":
+        options.add_argument("-headless")
+        options.set_preference("permissions.default.image", 2)
+        options.set_preference("gfx.downloadable_fonts.enabled", False)
+        options.set_preference("media.autoplay.default", 5)
+        options.set_preference("media.mediasource.enabled", False)
+        options.page_load_strategy = "eager"
+    return options
+
+def block_resources(driver):
+    """
+    Block the requests to BLOCKED_RESOURCES and BLOCKED_HOSTS through the DevTools protocol of Chrome.
+    """
+    driver.execute_cdp_cmd("Network.enable", {})
+    driver.execute_cdp_cmd("Network.setBlockedURLs", {"urls": BLOCKED_RESOURCES + BLOCKED_HOSTS})
+
+def init_driver( opt = "", profile=BROWSER_PROFILE):
+    """
+    Initialize and return a Chrome WebDriver, or a Firefox one with opt="a".
+    """
     try:
         if opt == "a":
-            return webdriver.Firefox()
-        return webdriver.Chrome()
+            # Firefox has no URL blocking through WebDriver, the fast profile only disables images, media and fonts
+            return webdriver.Firefox(options=firefox_options(profile))
+        driver = webdriver.Chrome(options=chrome_options(profile))
+        if profile == "fast":
+            block_resources(driver)
+        return driver
     except Exception as e:
         logger.error(f"ERROR INITIALIZING THE WEBDRIVER, message : {e}")
         return None
@@ -53,42 +96,107 @@ def get_url(driver, url):
     Load a URL with the WebDriver.
     """
     try:
-        driver.get(url)
+        rate_limiter.wait(url)
+        with metrics.timer("navigation"):
+            driver.get(url)
     except Exception as e:
         logger.error(f"ERROR TRYING TO GET URL, CHECK YOUR URL : {e}")
 
-def find_element(driver, selectors_key, name="", number="one", timeout=10):
+class AdaptiveTimeout:
     """
-    Find element(s) by CSS selector with wait.
+    Timeout derived from the load times observed recently.
+    """
+    def __init__(self, minimum=WAIT_MIN_TIMEOUT, maximum=WAIT_MAX_TIMEOUT, factor=3, history=20):
+        self.minimum = minimum
+        self.maximum = maximum
+        self.factor = factor
+        self.samples = deque(maxlen=history)
+
+    def record(self, seconds):
+        self.samples.append(seconds)
+
+    def record_timeout(self, timeout):
+        """
+        Record a wait that timed out, so the next timeout doubles instead of staying at a value too short for the pages.
+        """
+        self.samples.append(timeout * 2 / self.factor)
+
+    def value(self):
+        if not self.samples:
+            return self.maximum
+        return min(max(max(self.samples) * self.factor, self.minimum), self.maximum)
+
+wait_timeout = AdaptiveTimeout()
+
+page_cache = None
+page_cache_lock = threading.Lock()
+
+def get_page_cache():
+    """
+    Return the shared page cache, created on first use, or None when the cache is disabled.
+    """
+    global page_cache
+    with page_cache_lock:
+        if page_cache is None and CACHE_ENABLED:
+            page_cache = PageCache()
+    return page_cache
+
+def get_selector(selectors_keys):
     """
+    Return the CSS selector of one key, or a selector group matching any of several keys.
+    """
+    if isinstance(selectors_keys, (list, tuple)):
+        return ", ".join(CSS_SELECTORS[key] for key in selectors_keys)
+    return CSS_SELECTORS[selectors_keys]
+
+def wait_for(driver, condition, name="", timeout=None):
+    """
+    Wait for a condition with the adaptive timeout and log how long it took.
+    """
+    adaptive = not timeout
+    timeout = timeout or wait_timeout.value()
+    start = time.perf_counter()
     try:
-        if number == "one":
-            logger.info(f"Finding {name} element with selector: {CSS_SELECTORS[selectors_key]}")
-            return WebDriverWait(driver, timeout).until(
-                EC.presence_of_element_located((By.CSS_SELECTOR, CSS_SELECTORS[selectors_key]))
-            )
-        else:
-            logger.info(f"Finding {name} elements with selector: {CSS_SELECTORS[selectors_key]}")
-            return WebDriverWait(driver, timeout).until(
-                EC.presence_of_all_elements_located((By.CSS_SELECTOR, CSS_SELECTORS[selectors_key]))
-            )
+        result = WebDriverWait(driver, timeout).until(condition)
+        elapsed = time.perf_counter() - start
+        wait_timeout.record(elapsed)
+        metrics.observe("wait", elapsed)
+        logger.info(f"Waited {elapsed:.2f}s for {name}")
+        return result
     except Exception as e:
-        logger.error(f"ERROR FINDING ELEMENT, : {e}")
+        elapsed = time.perf_counter() - start
+        if adaptive:
+            wait_timeout.record_timeout(timeout)
+        metrics.observe("wait", elapsed)
+        logger.error(f"ERROR WAITING FOR {name} after {elapsed:.2f}s (timeout {timeout:.1f}s) : {e}")
         return None
 
+def find_element(driver, selectors_key, name="", number="one", timeout=None):
+    """
+    Find element(s) by CSS selector with wait.
+    """
+    selector = get_selector(selectors_key)
+    if number == "one":
+        logger.info(f"Finding {name} element with selector: {selector}")
+        condition = EC.presence_of_element_located((By.CSS_SELECTOR, selector))
+    else:
+        logger.info(f"Finding {name} elements with selector: {selector}")
+        condition = EC.presence_of_all_elements_located((By.CSS_SELECTOR, selector))
+    return wait_for(driver, condition, f"{name} [{selector}]", timeout)
+
 def click_on_element(driver, element, name=""):
     """
-    Click an element using JavaScript.
+    Click an element using JavaScript once it is clickable.
     """
     try:
-        time.sleep(3)
+        wait_for(driver, EC.element_to_be_clickable(element), f"{name} to be clickable")
         driver.execute_script("arguments[0].click();", element)
         return True
     except Exception as e:
         logger.error(f"CLICK ON THE ELEMENT : {name} field. Message : {e}")
         return False
 
-def find_and_click(driver, selectors_key, name="", number="one", timeout=10):
+def find_and_click(driver, selectors_key, name="", number="one", timeout=None):
     """
     Find and click an element by selector.
     """
@@ -99,33 +207,32 @@ def find_and_click(driver, selectors_key, name="", number="one", timeout=10):
         logger.error(f"Element [{name}] not found.")
         return False
 
-def get_number_of_pages(driver, url, timeout=15):
+def get_number_of_pages(driver, url=None, timeout=None):
     """
-    Return the number of pages for pagination.
+    Return the number of pages for pagination, read from the page already loaded in the driver.
+    The driver only navigates when a url other than its current one is given.
     """
-    driver.get(url)
+    if url and driver.current_url != url:
+        get_url(driver, url)
     try:
-        wait = WebDriverWait(driver, timeout)
-        wait.until(EC.presence_of_element_located(
-            (By.CSS_SELECTOR, CSS_SELECTORS[5]))
-        )
-        li_items = find_element(driver, 6, "pagination", "all", timeout)
-        page_numbers = []
-        for li in li_items:
-            try:
-                a_tag = li.find_element(By.TAG_NAME, "a")
-                text = a_tag.text.strip()
-                if text.isdigit():
-                    page_numbers.append(int(text))
-            except:
-                continue
-        if page_numbers:
-            return max(page_numbers)
-        return None
+        if find_element(driver, 5, "pagination", timeout=timeout) is None:
+            return None
+        return parse_number_of_pages(parse_html(driver.page_source))
     except Exception as e:
         logger.error(f"[!] Error retrieving pagination: {e}")
         return None
 
+def parse_number_of_pages(soup):
+    """
+    Return the number of pages of the pagination of a parsed listing page, or None.
+    """
+    page_numbers = []
+    for li in select(soup, 6):
+        a_tag = li.find("a")
+        if a_tag and a_tag.text.strip().isdigit():
+            page_numbers.append(int(a_tag.text.strip()))
+    return max(page_numbers) if page_numbers else None
+
 def get_all_pages_url(main_url, number_of_pages):
     """
     Build URLs for all pages.
@@ -166,93 +273,222 @@ def construct_company_object(infos):
         logger.error(f"Error initialising Company Object. : {e}")
         return 0
 
-def get_element_by_web_driver(driver, url, wait_time=0):
+def parse_html(html, kind=None):
+    """
+    Parse an HTML string with BeautifulSoup, using the configured parser backend.
+    """
+    if kind:
+        metrics.inc("pages", kind=kind)
+    with metrics.timer("parse"):
+        return parse_page(html, kind)
+
+def get_cached_element(url, kind=None):
+    """
+    Return the parsed page of a URL from the page cache while it is fresh, or None.
+    """
+    cache = get_page_cache() if kind else None
+    if cache is None:
+        return None
+    html = cache.get(url, kind)
+    return parse_html(html, kind) if html is not None else None
+
+def get_element_by_web_driver(driver, url, selectors_keys=None, kind=None):
     """
     Get and parse HTML with Selenium and BeautifulSoup.
+    When selectors keys are given, wait until one of them is present before reading the page.
+    Pages with a kind are served from the page cache while they are fresh.
     """
+    soup = get_cached_element(url, kind)
+    if soup is not None:
+        return soup
+    return load_element_by_web_driver(driver, url, selectors_keys, kind)
+
+def load_element_by_web_driver(driver, url, selectors_keys=None, kind=None):
+    """
+    Load and parse a page with the WebDriver, without looking it up in the page cache, and cache it once loaded.
+    """
+    cache = get_page_cache() if kind else None
     try:
         get_url(driver, url)
-        if wait_time > 0:
-            time.sleep(wait_time)
+        ready = True
+        if selectors_keys is not None:
+            ready = find_element(driver, selectors_keys, url) is not None
         html = driver.page_source
-        return BeautifulSoup(html, "html.parser")
+        # Pages that never showed the expected selector are not cached
+        if cache is not None and ready:
+            cache.put(url, kind, html)
+        return parse_html(html, kind)
     except Exception as e:
         logger.error(f"[!] Erreur chargement page WebDriver : {url}, {e}")
         return None
 
+def get_element_by_http(fetcher, url, kind=None):
+    """
+    Get and parse HTML with the HTTP fetcher.
+    """
+    html = fetcher.fetch(url, kind)
+    if html is None:
+        logger.error(f"[!] Erreur chargement page HTTP : {url}")
+        return None
+    return parse_html(html, kind)
+
 def get_companys_blocks(driver, url):
     """
     Get company blocks from a page.
     """
-    soup = get_element_by_web_driver(driver, url, 5)
+    soup = get_element_by_web_driver(driver, url, 7, "listing")
     if not soup:
         return []
     try:
-        return soup.select(CSS_SELECTORS[7])
+        return select(soup, 7)
     except Exception as e:
         logger.error(f"Error getting company blocks: {e}")
         return []
 
+def get_jobs_link(link):
+    """
+    Build the jobs page URL from a company showcase URL.
+    """
+    return urljoin(link.split("?")[0]+'/', "jobs")
+
+def get_card_name(block):
+    """
+    Return the company name shown on a card, or None.
+    """
+    name_tag = select_one(block, 8)
+    return name_tag.text if name_tag else None
+
+def get_card_link(block):
+    """
+    Return the absolute showcase URL of a company card, or None.
+    """
+    link_tag = select_one(block, 11)
+    return urljoin(MAIN_URL, link_tag['href']) if link_tag and link_tag.get('href') else None
+
+def get_card_infos(block, existing_companies = []):
+    """
+    Extract the infos shown on a company card, or {} if the company is already known.
+    """
+    name = select_one(block, 8).text if select_one(block, 8).text else "N/A"
+    if name in existing_companies:
+        logger.info(f"Company {name} already exists. Skipping.")
+        metrics.inc("skips")
+        return {}
+    details = select(block, 9) if select(block, 9) else []
+    domain = details[-3].text if len(details) > 2 else "N/A"
+    location = details[-2].text if len(details) > 1 else "N/A"
+    offer = select_one(block, 10).text if select_one(block, 10).text else "N/A"
+    link = get_card_link(block) or "N/A"
+    return {
+        "Name": name,
+        "Domain": domain,
+        "Location": location,
+        "Offer": offer,
+        "Link": link
+    }
+
+def add_offers_infos(infos, offres):
+    """
+    Add the job offers and the spontaneous application flag to the infos.
+    """
+    infos["Offres"] = offres
+    if "Candidature spontanée" in offres:
+        infos["Candidature spontanée"] = "Yes"
+    else:
+        infos["Candidature spontanée"] = "No"
+    return infos
+
 def get_companys_infos(driver, block, existing_companies = []):
     """
     Extract company info from a block.
     """
     try:
         # Extracting company information from the block
-        name = block.select_one(CSS_SELECTORS[8]).text if block.select_one(CSS_SELECTORS[8]).text else "N/A" 
-        if name in existing_companies:
-            logger.info(f"Company {name} already exists. Skipping.")
+        infos = get_card_infos(block, existing_companies)
+        if not infos:
             return {}
-        details = block.select(CSS_SELECTORS[9]) if block.select(CSS_SELECTORS[9]) else []
-        domain = details[-3].text if len(details) > 2 else "N/A"
-        location = details[-2].text if len(details) > 1 else "N/A"
-        offer = block.select_one(CSS_SELECTORS[10]).text if block.select_one(CSS_SELECTORS[10]).text else "N/A"
-        link = urljoin(MAIN_URL, block.select_one(CSS_SELECTORS[11])['href']) if block.select_one(CSS_SELECTORS[11]) else "N/A"
-        infos = {
-            "Name": name,
-            "Domain": domain,
-            "Location": location,
-            "Offer": offer,
-            "Link": link
-        }
-
-        jobs_link = urljoin(link.split("?")[0]+'/', "jobs")
-        offres = job_offers(driver, jobs_link)
-        infos["Offres"] = offres 
-
-        if "Candidature spontanée" in offres:
-            infos["Candidature spontanée"] = "Yes"
-        else:
-            infos["Candidature spontanée"] = "No"
-
-        infos = infos | get_other_infos(driver, link)
+
+        with metrics.timer("extraction"):
+            offres = job_offers(driver, get_jobs_link(infos["Link"]))
+            infos = add_offers_infos(infos, offres)
+
+            infos = infos | get_other_infos(driver, infos["Link"])
         return infos
 
     except Exception as e:
-        logger.error(f"Error retrieving information for {block.select_one(CSS_SELECTORS[8]).text} \n Message {e}")
+        logger.error(f"Error retrieving information for {select_one(block, 8).text} \n Message {e}")
         return {}
 
-def get_other_infos(driver, url):
+def get_companys_infos_http(fetcher, blocks, existing_companies = []):
     """
-    Get extra company info from a URL.
+    Extract company info from several blocks, fetching all their detail pages concurrently.
     """
-    block_dict = {}
-    # soup = get_element_by_requests(url, 1)
-    soup = get_element_by_web_driver(driver, url, 1)
-    if not soup:
-        return block_dict
+    cards = []
+    seen = set()
+    for block in blocks:
+        try:
+            infos = get_card_infos(block, existing_companies)
+        except Exception as e:
+            logger.error(f"Error retrieving card information \n Message {e}")
+            continue
+        if infos and infos["Name"] not in seen:
+            seen.add(infos["Name"])
+            cards.append(infos)
+
+    kinds = {}
+    for infos in cards:
+        kinds[get_jobs_link(infos["Link"])] = "jobs"
+        kinds[infos["Link"]] = "showcase"
+    with metrics.timer("fetch_batch"):
+        pages = fetcher.fetch_many(list(kinds), kinds)
+
+    all_infos = []
+    for infos in cards:
+        try:
+            jobs_html = pages.get(get_jobs_link(infos["Link"]))
+            if jobs_html is None:
+                logger.error(f"Failed to retrieve job offers from {get_jobs_link(infos['Link'])} or the page is not exists.")
+                offres = []
+            else:
+                offres = parse_job_offers(parse_html(jobs_html, "jobs"))
+            infos = add_offers_infos(infos, offres)
 
+            showcase_html = pages.get(infos["Link"])
+            if showcase_html is not None:
+                infos = infos | parse_other_infos(parse_html(showcase_html, "showcase"), infos["Link"])
+            all_infos.append(infos)
+        except Exception as e:
+            logger.error(f"Error retrieving information for {infos['Name']} \n Message {e}")
+    return all_infos
+
+def get_companies_infos(driver, blocks, existing_companies = [], fetcher=None):
+    """
+    Yield company info from blocks, using the WebDriver or the HTTP fetcher if one is given.
+    """
+    if fetcher is not None:
+        yield from get_companys_infos_http(fetcher, blocks, existing_companies)
+        return
+    for block in blocks:
+        infos = get_companys_infos(driver, block, existing_companies)
+        if infos:
+            yield infos
+
+def parse_other_infos(soup, url):
+    """
+    Extract extra company info from a showcase page.
+    """
+    block_dict = {}
     try:
-        block_dict["Web Site"] = soup.select_one(CSS_SELECTORS[12])['href'] #if soup.select_one(CSS_SELECTORS[12]) else None
+        block_dict["Web Site"] = select_one(soup, 12)['href'] #if select_one(soup, 12) else None
     except Exception as e:
         logger.error(f"Web site not found for {url} - {e}")
         block_dict["Web Site"] = "N/A"
 
-    block_details = soup.select(CSS_SELECTORS[13])
+    block_details = select(soup, 13)
     for block in block_details:
         try:
-            titre = block.select_one(CSS_SELECTORS[14]).text
-            contenu = block.select_one(CSS_SELECTORS[15]).text
+            titre = select_one(block, 14).text
+            contenu = select_one(block, 15).text
             block_dict[titre] = contenu
         except:
             logger.error(f"Error extracting details from block: {block}")
@@ -260,20 +496,37 @@ def get_other_infos(driver, url):
             continue
     return block_dict
 
-def job_offers(driver, urljobs):
+def get_other_infos(driver, url):
     """
-    Get job offers from a jobs URL.
+    Get extra company info from a URL.
     """
-    soup = get_element_by_web_driver(driver, urljobs, 2)
+    # soup = get_element_by_requests(url, 1)
+    soup = get_element_by_web_driver(driver, url, (12, 13), "showcase")
     if not soup:
-        logger.error(f"Failed to retrieve job offers from {urljobs} or the page is not exists.")
-        return []
-    jobs = soup.select(CSS_SELECTORS[16])
+        return {}
+    return parse_other_infos(soup, url)
+
+def parse_job_offers(soup):
+    """
+    Extract job offers from a jobs page.
+    """
+    jobs = select(soup, 16)
     formatted_jobs = [job.text for job in jobs]
-    spontane = soup.select_one(CSS_SELECTORS[20])
+    spontane = select_one(soup, 20)
     if spontane:
         formatted_jobs.append("Candidature spontanée")
     return formatted_jobs if formatted_jobs else ["Aucune offre d'emploi disponible"]
 
+def job_offers(driver, urljobs):
+    """
+    Get job offers from a jobs URL.
+    """
+    # A page showing neither an offer nor the applying button is read once the wait times out, and is not cached
+    soup = get_element_by_web_driver(driver, urljobs, (16, 20), "jobs")
+    if not soup:
+        logger.error(f"Failed to retrieve job offers from {urljobs} or the page is not exists.")
+        return []
+    return parse_job_offers(soup)
+
 if __name__ == "__main__":
     pass
\ No newline at end of file
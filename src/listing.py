@@ -0,0 +1,262 @@
+# -*- coding: utf-8 -*-
+"""
+Listing-only crawl: scrape the company cards of every listing page without visiting the company pages.
+
+    python src/listing.py
+    python src/listing.py --backend http --workers 16 --sink sqlite
+
+The number of pages is read from the pagination of the first page, the other pages are fetched in parallel.
+"""
+import argparse
+import csv
+import logging
+import queue
+import sqlite3
+import threading
+import time
+from collections import deque
+from concurrent.futures import ThreadPoolExecutor
+
+from functions import *
+
+logger = logging.getLogger(__name__)
+
+CARD_FIELDS = ("Name", "Domain", "Location", "Offer", "Link")
+
+def parse_cards(soup):
+    """
+    Return the infos of the company cards of a parsed listing page.
+    """
+    cards = []
+    for block in select(soup, 7):
+        try:
+            cards.append(get_card_infos(block))
+        except Exception as e:
+            logger.error(f"Error extracting data for a company: {e}")
+    return cards
+
+class CsvSink:
+    """
+    Write the cards to a CSV file with csv.writer, one row per card.
+    """
+    def __init__(self, file=LISTING_FILE):
+        self.file = open(file, "w", encoding="utf-8", newline="")
+        self.writer = csv.writer(self.file)
+        self.writer.writerow(CARD_FIELDS)
+
+    def write(self, cards, page):
+        self.writer.writerows([card.get(field, "N/A") for field in CARD_FIELDS] for card in cards)
+        self.file.flush()
+
+    def close(self):
+        self.file.close()
+
+class SqliteSink:
+    """
+    Upsert the cards into the listing_cards table of the SQLite DB, one transaction per page.
+    """
+    def __init__(self, db=DB_FILE):
+        self.conn = sqlite3.connect(db, timeout=30)
+        self.conn.execute('''
+            CREATE TABLE IF NOT EXISTS listing_cards (
+                name TEXT PRIMARY KEY,
+                domain TEXT,
+                location TEXT,
+                offer TEXT,
+                link TEXT,
+                page TEXT,
+                updated_at REAL
+            );
+        ''')
+        self.conn.commit()
+
+    def write(self, cards, page):
+        now = time.time()
+        with self.conn:
+            self.conn.executemany('''
+                INSERT INTO listing_cards (name, domain, location, offer, link, page, updated_at)
+                VALUES (?, ?, ?, ?, ?, ?, ?)
+                ON CONFLICT(name) DO UPDATE SET
+                    domain = excluded.domain,
+                    location = excluded.location,
+                    offer = excluded.offer,
+                    link = excluded.link,
+                    page = excluded.page,
+                    updated_at = excluded.updated_at
+            ''', [(*(card.get(field) for field in CARD_FIELDS), page, now) for card in cards])
+
+    def close(self):
+        self.conn.close()
+
+class HttpPages:
+    """
+    Fetch listing pages over HTTP, workers pages at a time.
+    """
+    def __init__(self, workers):
+        from fetcher import HttpFetcher
+        self.workers = workers
+        self.fetcher = HttpFetcher(workers, HTTP_TIMEOUT, get_page_cache())
+
+    def fetch(self, urls):
+        """
+        Yield (url, soup) in the order of the URLs, soup being None when the page could not be fetched.
+        """
+        # Batches bound the number of pages held in memory before they are parsed
+        batch_size = self.workers * 4
+        for start in range(0, len(urls), batch_size):
+            batch = urls[start:start + batch_size]
+            pages = self.fetcher.fetch_many(batch, {url: "listing" for url in batch})
+            for url in batch:
+                html = pages.get(url)
+                yield url, parse_html(html, "listing") if html else None
+
+    def close(self):
+        self.fetcher.close()
+
+class DriverPages:
+    """
+    Fetch listing pages with one WebDriver per worker thread.
+    """
+    def __init__(self, workers):
+        self.workers = workers
+        self.executor = ThreadPoolExecutor(workers, thread_name_prefix="listing-worker")
+        self.local = threading.local()
+        self.lock = threading.Lock()
+        self.drivers = []
+
+    def _load(self, url):
+        # Cached pages are served without starting a browser, so a resumed crawl only starts the drivers it needs
+        soup = get_cached_element(url, "listing")
+        if soup is not None:
+            return url, soup
+        driver = getattr(self.local, "driver", None)
+        if driver is None:
+            driver = init_driver()
+            if not driver:
+                return url, None
+            self.local.driver = driver
+            with self.lock:
+                self.drivers.append(driver)
+        return url, load_element_by_web_driver(driver, url, 7, "listing")
+
+    def fetch(self, urls):
+        """
+        Yield (url, soup) in the order of the URLs, soup being None when the page could not be loaded.
+        """
+        # At most two pages per worker are loaded ahead of the caller
+        futures = deque()
+        for url in urls:
+            futures.append(self.executor.submit(self._load, url))
+            if len(futures) >= self.workers * 2:
+                yield futures.popleft().result()
+        while futures:
+            yield futures.popleft().result()
+
+    def close(self):
+        self.executor.shutdown(wait=True, cancel_futures=True)
+        for driver in self.drivers:
+            driver.quit()
+
+_END = object()
+
+def prefetch(pages, size):
+    """
+    Consume an iterator of pages on a background thread, up to size pages ahead of the caller.
+    """
+    items = queue.Queue(maxsize=size)
+
+    def produce():
+        try:
+            for item in pages:
+                items.put(item)
+        except Exception as e:
+            logger.error(f"Error prefetching listing pages: {e}")
+        finally:
+            items.put(_END)
+
+    threading.Thread(target=produce, name="listing-prefetch", daemon=True).start()
+    while True:
+        item = items.get()
+        if item is _END:
+            return
+        yield item
+
+def open_pages(backend=FETCH_BACKEND, workers=LISTING_WORKERS):
+    return HttpPages(workers) if backend == "http" else DriverPages(workers)
+
+def crawl_listing(url, sink, backend=FETCH_BACKEND, workers=LISTING_WORKERS):
+    """
+    Write the cards of every listing page to the sink and return the number of cards written.
+    url is the first page, its pagination gives the number of pages.
+    """
+    start = time.perf_counter()
+    pages = open_pages(backend, workers)
+    cards = 0
+    try:
+        _, first = next(pages.fetch([url]))
+        if first is None:
+            logger.error(f"[!] Unable to load the first listing page : {url}")
+            return 0
+        number_of_pages = parse_number_of_pages(first) or 1
+        logger.info(f"{number_of_pages} listing pages to crawl with {workers} workers ({backend})")
+        page_cards = parse_cards(first)
+        sink.write(page_cards, url)
+        cards += len(page_cards)
+        for page, soup in pages.fetch(get_all_pages_url(url, number_of_pages)[1:]):
+            if soup is None:
+                logger.error(f"Error loading page {page}")
+                continue
+            page_cards = parse_cards(soup)
+            sink.write(page_cards, page)
+            cards += len(page_cards)
+            logger.info(f"Page {page} done ({len(page_cards)} cards).")
+    finally:
+        pages.close()
+        sink.close()
+    elapsed = time.perf_counter() - start
+    logger.info(f"{cards} cards written in {elapsed:.0f}s")
+    return cards
+
+def crawl_search(url, sink):
+    """
+    Write the cards of every company matching the refinements of a listing URL, queried from the search backend.
+    """
+    from search import SearchClient, refinements_from_url
+    start = time.perf_counter()
+    client = SearchClient.from_page()
+    cards = 0
+    batch = []
+    try:
+        for infos in client.iter_infos(refinements_from_url(url)):
+            batch.append(infos)
+            if len(batch) >= client.hits_per_page:
+                sink.write(batch, url)
+                cards += len(batch)
+                batch = []
+        if batch:
+            sink.write(batch, url)
+            cards += len(batch)
+    finally:
+        sink.close()
+    elapsed = time.perf_counter() - start
+    logger.info(f"{cards} cards written in {elapsed:.0f}s")
+    return cards
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Scrape the company cards of every listing page.")
+    parser.add_argument("--url", default=f"{COMPANIES_URL}?page=1", help="first listing page, with page=1 in its query")
+    parser.add_argument("--backend", choices=("driver", "http", "search"), default=FETCH_BACKEND, help="how the listing pages are fetched, or search to query the search backend")
+    parser.add_argument("--workers", type=int, default=LISTING_WORKERS, help="listing pages fetched in parallel")
+    parser.add_argument("--sink", choices=("csv", "sqlite"), default="csv", help="write the cards to LISTING_FILE or to the listing_cards table of DB_FILE")
+    parser.add_argument("--output", help="CSV file or SQLite DB to write to")
+    args = parser.parse_args()
+
+    setup_logger()
+    if args.sink == "csv":
+        sink = CsvSink(args.output or LISTING_FILE)
+    else:
+        sink = SqliteSink(args.output or DB_FILE)
+    if args.backend == "search":
+        crawl_search(args.url, sink)
+    else:
+        crawl_listing(args.url, sink, args.backend, args.workers)
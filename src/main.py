@@ -3,91 +3,205 @@ from IDS import *
 from SELECTORS import *
 from CONST import *
 from apply import *
+from Frontier import Frontier, update_states, IN_PROGRESS, DONE, FAILED
+from Sink import CompanySink
+from JsonlStore import JsonlStore
+from listing import open_pages, prefetch
+from KnownCompanies import KnownCompanies
+from Metrics import ErrorCounter, metrics
+
+def export_companies_to_json(store):
+    """
+    Compact the JSON Lines store and export it to the JSON file in the nested format.
+    """
+    try:
+        store.compact()
+        store.export_json(JSON_FILE)
+        logger.info(f"Companies data exported from {store.file} to {JSON_FILE}")
+    except (FileExistsError, FileNotFoundError) as e:
+        logger.error(f"Error exporting companies data to {JSON_FILE}. Please check the file paths.")
+    except Exception as e:
+        logger.error(f"An unexpected error occurred while exporting companies data: {e}")
+
+def seed_listing_pages(driver, frontier):
+    """
+    Run the search and add its listing pages to the frontier, unless a previous run already did.
+    Return False when the number of pages could not be read, nothing being seeded so that the next run searches again.
+    """
+    if not frontier.is_empty("listing"):
+        logger.info(f"Resuming the crawl from the frontier : {frontier.counts()}")
+        return True
+    get_url(driver, COMPANIES_URL)
+    find_and_click(driver, 1, "SECTOR")
+    find_and_click(driver, 3, "TECH")
+    find_and_click(driver, 4, "SEARCH BUTTON")
+
+    # You can comment the the five previous lines and uncomment the following line to skip directly to a specific page
+    # get_url(driver, MAIN_TECH_PAGE_URL) # or you can use any other page url
+    # find_element(driver, 7, "COMPANY CARDS")
+    # The pagination is read from the search results already loaded, without navigating again
+    page = driver.current_url
+    number_of_pages = get_number_of_pages(driver)
+    if not number_of_pages:
+        # Seeding a single page would make every later run resume a one-page crawl
+        logger.error(f"Number of listing pages not found on {page}, nothing seeded.")
+        return False
+    frontier.add_many("listing", [(url, None) for url in get_all_pages_url(page, number_of_pages)])
+    return True
+
+def add_listing_cards(frontier, page, soup):
+    """
+    Add the company cards of a listing page to the frontier and mark the page done, or failed without cards.
+    """
+    blocks = select(soup, 7) if soup else []
+    cards = [(get_card_link(block), str(block)) for block in blocks if get_card_link(block)]
+    frontier.add_many("company", cards, parent=page)
+    frontier.set_state(page, DONE if blocks else FAILED)
+    return len(cards)
+
+def scrape_cards(driver, frontier, cards, sink, existing_companies_names, fetcher=None, pool=None):
+    """
+    Scrape the given frontier company cards and stream each company to the sink as soon as it is scraped.
+    The sink marks the card done in the same transaction as the company is saved.
+    """
+    blocks = {}
+    for url, payload in cards:
+        block = select_one(parse_html(payload), 7)
+        if block is None:
+            frontier.set_state(url, FAILED)
+        elif get_card_name(block) in existing_companies_names:
+            logger.info(f"Company {get_card_name(block)} already exists. Skipping.")
+            metrics.inc("skips")
+            frontier.set_state(url, DONE)
+        else:
+            blocks[url] = block
+    if not blocks:
+        return
+    frontier.set_state(list(blocks), IN_PROGRESS)
+
+    if pool is not None:
+        # The pool reports each card through its on_result callback
+        for url, block in blocks.items():
+            if not pool.submit(block, url):
+                frontier.set_state(url, DONE)
+        return
+
+    scraped = set()
+    for infos in get_companies_infos(driver, blocks.values(), existing_companies_names, fetcher):
+        company = construct_company_object(infos)
+        if not company:
+            continue
+        sink.put(company, infos["Link"])
+        scraped.add(infos["Link"])
+        existing_companies_names.add(company.name)
+        # Option to apply to the company
+        # Uncomment the following lines to enable application functionality and add the filter conditions you need
+        # try:
+            #Filter conditions for applying to a company
+        #     if company.spontane == "Oui" and "Paris" in company.location:
+        #         if not connected:
+        #             driver_for_apply = init_driver()
+        #             if not driver_for_apply:
+        #                 logger.error("Failed to initialize the web driver for application. Skipping application process.")
+        #                 continue
+        #             connect(driver_for_apply)
+        #             connected = True
+        #         if applications.claim(company.name):
+        #             success = apply_to_company(driver_for_apply, company)
+        #             applications.record(company.name, "applied" if success else "ignored")
+        # except Exception as e:
+        #     logger.error(f"An error occurred while applying to {company.name}: {e}")
+        #     continue
+    # Cards that did not produce a company failed, they are retried on the next run
+    frontier.set_state([url for url in blocks if url not in scraped], FAILED)
 
 def main():
     """
     Main function to scrape company data and save it to SQLite and JSON files.
+    The crawl frontier is kept in the SQLite DB, so a stopped run resumes where it left off.
     """
-    # Flags to track connection and saving status
+    # Flags to track connection status
     connected = False
-    saved = False
 
     # Retrieve existing companies from the database
-    companies = Companies([])
-    try:
-        existing_companies_names = [comp.name for comp in companies.companies]
-    except Exception as e:
-        logger.error(f"Error retrieving existing companies: {e}")
-        existing_companies_names = []
+    existing_companies_names = KnownCompanies(DB_FILE, KNOWN_COMPANIES_BLOOM)
+    logger.info(f"{len(existing_companies_names)} companies already in {DB_FILE}")
         
     logger.info("Starting the company scraping process...")
+    logging.getLogger().addHandler(ErrorCounter(metrics))
+    metrics.start_exporter()
     driver = init_driver()
     if not driver:
         # If driver initialization fails, log the error and exit
         logger.error("Failed to initialize the web driver. Exiting.")
         exit(1)
 
-    get_url(driver, COMPANIES_URL)
-    time.sleep(2)
-    find_and_click(driver, 1, "SECTOR")
-    find_and_click(driver, 3, "TECH")
-    find_and_click(driver, 4, "SEARCH BUTTON")
+    frontier = Frontier(DB_FILE)
+    if not seed_listing_pages(driver, frontier):
+        metrics.stop_exporter()
+        frontier.close()
+        existing_companies_names.close()
+        driver.quit()
+        exit(1)
 
-    # You can comment the the five previous lines and uncomment the following line to skip directly to a specific page
-    # get_url(driver, MAIN_TECH_PAGE_URL) # or you can use any other page url
-    # time.sleep(2)
-    page = driver.current_url
-    number_of_pages = get_number_of_pages(driver, page)
-    all_pages = get_all_pages_url(page, number_of_pages)
+    # Scraped companies are streamed to the DB by a writer thread, which also marks their cards done
+    # and appends them to the JSON Lines store, seeded from the DB the first time
+    jsonl = JsonlStore(JSONL_FILE)
+    if not jsonl.exists():
+        jsonl.append_many(Companies([]).iter_companies_from_sqlite(DB_FILE))
+    sink = CompanySink(DB_FILE, on_batch=lambda cursor, urls: update_states(cursor, urls, DONE), jsonl=jsonl).start()
+    # Detail pages are fetched over HTTP when the "http" backend is selected, the driver only handles the search
+    fetcher = None
+    if FETCH_BACKEND == "http":
+        from fetcher import HttpFetcher
+        fetcher = HttpFetcher(HTTP_CONCURRENCY, HTTP_TIMEOUT, get_page_cache())
+    # With several WebDriver workers, the pool scrapes the details instead of the main driver
+    pool = None
+    if DRIVER_POOL_SIZE > 1 and fetcher is None:
+        from DriverPool import DriverPool
+
+        def on_result(url, company):
+            if company is None:
+                frontier.set_state(url, FAILED)
+                return
+            sink.put(company, url)
+            existing_companies_names.add(company.name)
+
+        pool = DriverPool(None, existing_companies_names, DRIVER_POOL_SIZE, on_result=on_result).start()
+    pages = open_pages("http" if fetcher is not None else "driver", LISTING_WORKERS)
     try:
-        for page in all_pages:
+        # Cards recorded by a previous run but not scraped yet come first
+        scrape_cards(driver, frontier, frontier.pending("company"), sink, existing_companies_names, fetcher, pool)
+        # Listing pages are loaded in parallel, ahead of the detail pages being scraped
+        listing_pages = [page for page, _ in frontier.pending("listing")]
+        for page, soup in prefetch(pages.fetch(listing_pages), LISTING_WORKERS * 2):
             logger.info(f"Processing page: {page}")
-            blocks = get_companys_blocks(driver, page)
-            for block in blocks:
-                infos = get_companys_infos(driver, block, existing_companies_names)
-                if infos:
-                    company = construct_company_object(infos)
-                    companies.companies.append(company)
-                    existing_companies_names.append(company.name)
-                    # Option to apply to the company
-                    # Uncomment the following lines to enable application functionality and add the filter conditions you need
-                    # try:
-                        #Filter conditions for applying to a company
-                    #     if company.spontane == "Oui" and "Paris" in company.location:
-                    #         if not connected:
-                    #             driver_for_apply = init_driver()
-                    #             if not driver_for_apply:
-                    #                 logger.error("Failed to initialize the web driver for application. Skipping application process.")
-                    #                 continue
-                    #             connect(driver_for_apply)
-                    #             connected = True
-                    #         applied_companies = get_companies_list(APPLIED)
-                    #         ignored_companies = get_companies_list(IGNORED)
-                    #         if company.name not in applied_companies + ignored_companies:
-                    #             apply_to_company(driver_for_apply, company)
-                    # except Exception as e:
-                    #     logger.error(f"An error occurred while applying to {company.name}: {e}")
-                    #     continue
+            frontier.set_state(page, IN_PROGRESS)
+            add_listing_cards(frontier, page, soup)
+            scrape_cards(driver, frontier, frontier.pending("company", page), sink, existing_companies_names, fetcher, pool)
+        if pool is not None:
+            pool.join()
     except KeyboardInterrupt as e:
-        if len(companies.companies) > 0:
-            logger.info(f"Total companies found: {len(companies.companies)}")
-            # Save the companies data to SQLite and JSON files
-            try:
-                companies.save_companies_to_sqlite(DB_FILE)
-                companies.save_companies_to_json(JSON_FILE)
-                logger.info(f"Companies data saved to {DB_FILE} and {JSON_FILE}")
-                saved = True
-            except (FileExistsError, FileNotFoundError) as e:
-                logger.error(f"Error saving companies data to files: {DB_FILE} or {JSON_FILE}. Please check the file paths.")
-            except Exception as e:
-                logger.error(f"An unexpected error occurred while saving companies data: {e}")
-            if not saved:
-                logger.error("Saved companies data to defines files failed. Saving it in othet files data.db and data.json")
-                companies.save_companies_to_sqlite("data.db")
-                companies.save_companies_to_json("data.json")
-        else:
-            logger.info("No companies found to save.")
+        if pool is not None:
+            pool.close(cancel=True)
+            pool = None
 
+    if pool is not None:
+        pool.close()
+    pages.close()
+    sink.close()
+    logger.info(f"Total companies saved: {sink.written}")
+    export_companies_to_json(jsonl)
+    logger.info(f"Crawl frontier : {frontier.counts()}")
+    if get_page_cache() is not None:
+        logger.info(f"Page cache : {get_page_cache().stats()}")
+    metrics.stop_exporter()
+    metrics.write_summary()
+    logger.info(f"Metrics : {metrics.summary()}")
+    frontier.close()
+    existing_companies_names.close()
+    if fetcher is not None:
+        fetcher.close()
     driver.quit()
     logger.info("Company scraping process completed successfully.")
 
@@ -95,4 +209,5 @@ if __name__ == "__main__":
     import os
     os.makedirs("log", exist_ok=True)
     os.makedirs("data", exist_ok=True)
+    setup_logger()
     main()
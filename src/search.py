@@ -0,0 +1,177 @@
+# -*- coding: utf-8 -*-
+"""
+Client of the search backend behind the listing pages, fetching the company hits as JSON in bulk.
+
+    python src/search.py
+    python src/search.py --url "<listing URL with refinementList filters>"
+
+The refinements of the listing URL (MAIN_TECH_PAGE_URL by default) are sent as facet filters.
+SEARCH_APP_ID, SEARCH_API_KEY and SEARCH_INDEX are read from the listing page when they are not set in CONST.py.
+"""
+import argparse
+import json
+import logging
+import re
+import urllib.request
+from urllib.parse import parse_qs, urlencode, urljoin, urlparse
+
+from CONST import *
+from SELECTORS import MAIN_URL, COMPANIES_URL, MAIN_TECH_PAGE_URL
+
+logger = logging.getLogger(__name__)
+
+HEADERS = {
+    "User-Agent": "Mozilla/5.0 (X11; Linux x86_64) AppleWebKit/537.36 (KHTML, like Gecko) Chrome/124.0 Safari/537.36",
+    "Content-Type": "application/json",
+}
+
+# Patterns of the search settings in the configuration embedded in the listing page
+CREDENTIALS_PATTERNS = {
+    "app_id": r'ALGOLIA_APPLICATION_ID"?\s*[:=]\s*"([^"]+)"',
+    "api_key": r'ALGOLIA_API_KEY[A-Z_]*"?\s*[:=]\s*"([^"]+)"',
+    "index": r'ALGOLIA_COMPANIES_INDEX[A-Z_]*"?\s*[:=]\s*"([^"]+)"',
+}
+
+def refinements_from_url(url):
+    """
+    Return the {attribute: [values]} refinements of a listing URL, e.g. refinementList[sectors_name.fr.Tech][]=Logiciels.
+    """
+    refinements = {}
+    for key, values in parse_qs(urlparse(url).query).items():
+        match = re.fullmatch(r"refinementList\[(.+?)\](?:\[\d*\])?", key)
+        if match:
+            refinements.setdefault(match.group(1), []).extend(values)
+    return refinements
+
+def discover_credentials(html):
+    """
+    Return the search settings found in the HTML of a listing page, None for the ones not found.
+    """
+    credentials = {}
+    for name, pattern in CREDENTIALS_PATTERNS.items():
+        match = re.search(pattern, html)
+        credentials[name] = match.group(1) if match else None
+    return credentials
+
+def localized(value, language):
+    """
+    Return the text of a value that may be translated, e.g. {"fr": "Logiciels", "en": "Software"}.
+    """
+    if isinstance(value, dict):
+        return value.get(language) or next(iter(value.values()), None)
+    return value
+
+def hit_to_infos(hit, language="fr"):
+    """
+    Map a company hit onto the infos dict accepted by construct_company_object.
+    """
+    sectors = hit.get("sectors") or []
+    domain = localized(sectors[0].get("name"), language) if sectors and isinstance(sectors[0], dict) else "N/A"
+    offices = hit.get("offices") or []
+    location = offices[0].get("city") if offices and isinstance(offices[0], dict) else "N/A"
+    jobs = hit.get("nb_jobs", hit.get("jobs_count"))
+    infos = {
+        "Name": hit.get("name", "N/A"),
+        "Domain": domain or "N/A",
+        "Location": location or "N/A",
+        "Offer": f"{jobs} offres" if jobs is not None else "N/A",
+        "Link": urljoin(MAIN_URL, f"{language}/companies/{hit['slug']}") if hit.get("slug") else "N/A",
+    }
+    if hit.get("website"):
+        infos["Web Site"] = hit["website"]
+    if hit.get("nb_employees") is not None:
+        infos["Collaborateurs"] = str(hit["nb_employees"])
+    if hit.get("average_age") is not None:
+        infos["Âge moyen"] = f"{hit['average_age']} ans"
+    return infos
+
+class SearchClient:
+    """
+    Query the search backend directly and page through the hits, SEARCH_HITS_PER_PAGE at a time.
+    """
+    def __init__(self, app_id=SEARCH_APP_ID, api_key=SEARCH_API_KEY, index=SEARCH_INDEX, host=None,
+                 hits_per_page=SEARCH_HITS_PER_PAGE, timeout=HTTP_TIMEOUT):
+        self.app_id = app_id
+        self.api_key = api_key
+        self.index = index
+        # The host can point to a local server replaying recorded responses
+        self.host = host or f"https://{app_id}-dsn.algolia.net"
+        self.hits_per_page = hits_per_page
+        self.timeout = timeout
+
+    @classmethod
+    def from_page(cls, url=COMPANIES_URL, **kwargs):
+        """
+        Build a client with the settings of CONST.py, completed with the ones read from the listing page.
+        """
+        credentials = {"app_id": SEARCH_APP_ID, "api_key": SEARCH_API_KEY, "index": SEARCH_INDEX}
+        if not all(credentials.values()):
+            request = urllib.request.Request(url, headers={"User-Agent": HEADERS["User-Agent"]})
+            with urllib.request.urlopen(request, timeout=HTTP_TIMEOUT) as response:
+                found = discover_credentials(response.read().decode("utf-8", "replace"))
+            credentials = {name: value or found[name] for name, value in credentials.items()}
+        missing = [name for name, value in credentials.items() if not value]
+        if missing:
+            raise RuntimeError(f"Search settings not found in {url}: {missing}, set them in CONST.py")
+        return cls(**credentials, **kwargs)
+
+    def query(self, refinements=None, page=0, query=""):
+        """
+        Run one search request and return its JSON response.
+        Values of one attribute are OR-ed, attributes are AND-ed, as in the refinementList of the listing URL.
+        """
+        params = {"query": query, "hitsPerPage": self.hits_per_page, "page": page}
+        if refinements:
+            params["facetFilters"] = json.dumps([
+                [f"{attribute}:{value}" for value in values] for attribute, values in refinements.items()
+            ])
+        request = urllib.request.Request(
+            f"{self.host}/1/indexes/{self.index}/query",
+            data=json.dumps({"params": urlencode(params)}).encode("utf-8"),
+            headers={**HEADERS, "X-Algolia-Application-Id": self.app_id, "X-Algolia-API-Key": self.api_key},
+            method="POST",
+        )
+        with urllib.request.urlopen(request, timeout=self.timeout) as response:
+            return json.load(response)
+
+    def iter_hits(self, refinements=None, query=""):
+        """
+        Yield every hit of the search, one request per page of hits.
+        """
+        page = 0
+        while True:
+            response = self.query(refinements, page, query)
+            hits = response.get("hits", [])
+            logger.info(f"[Search] page {page + 1}/{response.get('nbPages', '?')} : {len(hits)} hits")
+            yield from hits
+            page += 1
+            if not hits or page >= response.get("nbPages", 0):
+                break
+
+    def iter_infos(self, refinements=None, query="", language="fr"):
+        for hit in self.iter_hits(refinements, query):
+            yield hit_to_infos(hit, language)
+
+if __name__ == "__main__":
+    from functions import construct_company_object, setup_logger
+    from KnownCompanies import KnownCompanies
+    from Sink import CompanySink
+
+    parser = argparse.ArgumentParser(description="Save the companies of a search to the SQLite DB without a browser.")
+    parser.add_argument("--url", default=MAIN_TECH_PAGE_URL, help="listing URL whose refinements are searched")
+    parser.add_argument("--host", help="search host, e.g. a local server replaying recorded responses")
+    args = parser.parse_args()
+
+    setup_logger()
+    client = SearchClient.from_page(host=args.host)
+    known = KnownCompanies(DB_FILE)
+    with CompanySink(DB_FILE) as sink:
+        for infos in client.iter_infos(refinements_from_url(args.url)):
+            if infos["Name"] in known:
+                continue
+            company = construct_company_object(infos)
+            if company:
+                sink.put(company)
+                known.add(company.name)
+    known.close()
+    logger.info(f"[Search] {sink.written} companies saved to {DB_FILE}")
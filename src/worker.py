@@ -0,0 +1,92 @@
+# -*- coding: utf-8 -*-
+"""
+Coordinator and worker processes sharing one crawl through the frontier table of the SQLite DB.
+
+    python src/worker.py coordinator
+    python src/worker.py worker --processes 4
+
+The coordinator runs the search and adds the company cards of every listing page to the frontier.
+Workers, on this machine or on others sharing the filesystem, lease company cards, scrape them and upsert the companies.
+A card whose lease expires, because its worker stopped or crashed, is leased again by another worker.
+"""
+import argparse
+import multiprocessing
+import os
+import socket
+import time
+
+from main import *
+
+def coordinate(db=DB_FILE):
+    """
+    Seed the frontier with the listing pages of the search and the company cards they show.
+    """
+    driver = init_driver()
+    if not driver:
+        logger.error("Failed to initialize the web driver. Exiting.")
+        return 0
+    frontier = Frontier(db)
+    pages = open_pages(FETCH_BACKEND, LISTING_WORKERS)
+    cards = 0
+    try:
+        if not seed_listing_pages(driver, frontier):
+            return 0
+        listing_pages = [page for page, _ in frontier.pending("listing")]
+        for page, soup in prefetch(pages.fetch(listing_pages), LISTING_WORKERS * 2):
+            frontier.set_state(page, IN_PROGRESS)
+            cards += add_listing_cards(frontier, page, soup)
+        logger.info(f"[Coordinator] {cards} company cards seeded : {frontier.counts()}")
+    finally:
+        pages.close()
+        frontier.close()
+        driver.quit()
+    return cards
+
+def work(db=DB_FILE, owner=None, batch=WORKER_LEASE_BATCH, lease=WORKER_LEASE_SECONDS):
+    """
+    Lease company cards until none is left and scrape them, the sink marking each card done with its company.
+    """
+    owner = owner or f"{socket.gethostname()}:{os.getpid()}"
+    driver = init_driver()
+    if not driver:
+        logger.error(f"[Worker {owner}] Failed to initialize the web driver. Exiting.")
+        return
+    frontier = Frontier(db)
+    known = KnownCompanies(db)
+    sink = CompanySink(db, on_batch=lambda cursor, urls: update_states(cursor, urls, DONE)).start()
+    try:
+        while True:
+            cards = frontier.lease("company", owner, batch, lease)
+            if not cards:
+                # Cards leased by other workers are handed out again if their lease expires
+                if not frontier.remaining("company"):
+                    break
+                time.sleep(WORKER_POLL_INTERVAL)
+                continue
+            logger.info(f"[Worker {owner}] {len(cards)} company cards leased")
+            scrape_cards(driver, frontier, cards, sink, known)
+    finally:
+        sink.close()
+        known.close()
+        frontier.close()
+        driver.quit()
+    logger.info(f"[Worker {owner}] {sink.written} companies saved")
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Share one crawl between several processes.")
+    parser.add_argument("role", choices=("coordinator", "worker"))
+    parser.add_argument("--db", default=DB_FILE, help="SQLite DB holding the frontier and the companies")
+    parser.add_argument("--processes", type=int, default=1, help="worker processes started on this machine")
+    args = parser.parse_args()
+
+    os.makedirs("log", exist_ok=True)
+    os.makedirs("data", exist_ok=True)
+    setup_logger()
+    if args.role == "coordinator":
+        coordinate(args.db)
+    else:
+        processes = [multiprocessing.Process(target=work, args=(args.db,)) for _ in range(args.processes)]
+        for process in processes:
+            process.start()
+        for process in processes:
+            process.join()
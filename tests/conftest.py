@@ -0,0 +1,83 @@
+import os
+import sys
+import threading
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+import pytest
+
+SRC = os.path.join(os.path.dirname(os.path.abspath(__file__)), os.pardir, "src")
+# Pages generated by benchmark.make_fixtures and hand-written search responses, shaped like the website ones
+FIXTURES = os.path.join(os.path.dirname(os.path.abspath(__file__)), "fixtures")
+sys.path.insert(0, SRC)
+
+def read_fixture(name):
+    with open(os.path.join(FIXTURES, name), "r", encoding="utf-8") as f:
+        return f.read()
+
+class StandInServer:
+    """
+    Local HTTP server answering each path with a fixed response, or with a function of the request.
+    Every request received is kept in requests as (method, path, headers, body).
+    """
+    def __init__(self):
+        self.routes = {}
+        self.requests = []
+        self.lock = threading.Lock()
+        self.httpd = ThreadingHTTPServer(("127.0.0.1", 0), self._handler())
+        self.thread = threading.Thread(target=self.httpd.serve_forever, daemon=True)
+
+    def _handler(self):
+        server = self
+
+        class Handler(BaseHTTPRequestHandler):
+            def _answer(self):
+                length = int(self.headers.get("Content-Length") or 0)
+                body = self.rfile.read(length) if length else b""
+                path = self.path.split("?")[0]
+                request = (self.command, self.path, dict(self.headers), body)
+                with server.lock:
+                    server.requests.append(request)
+                route = server.routes.get(path)
+                if route is None:
+                    status, headers, content = 404, {}, ""
+                elif callable(route):
+                    status, headers, content = route(*request)
+                else:
+                    status, headers, content = route
+                data = content.encode("utf-8") if isinstance(content, str) else content
+                self.send_response(status)
+                for name, value in headers.items():
+                    self.send_header(name, value)
+                self.send_header("Content-Length", str(len(data)))
+                self.end_headers()
+                self.wfile.write(data)
+
+            do_GET = _answer
+            do_POST = _answer
+
+            def log_message(self, format, *args):
+                pass
+
+        return Handler
+
+    def url(self, path):
+        host, port = self.httpd.server_address
+        return f"http://{host}:{port}{path}"
+
+    def paths(self):
+        with self.lock:
+            return [path.split("?")[0] for _, path, _, _ in self.requests]
+
+    def start(self):
+        self.thread.start()
+        return self
+
+    def close(self):
+        self.httpd.shutdown()
+        self.httpd.server_close()
+
+@pytest.fixture
+def server():
+    stand_in = StandInServer().start()
+    yield stand_in
+    stand_in.close()
@@ -0,0 +1,35 @@
+import json
+import sqlite3
+
+from Applications import Applications, APPLIED_STATUS, CLAIMED
+from cli import main
+
+def test_claim_is_given_once(tmp_path):
+    applications = Applications(str(tmp_path / "data.db"))
+
+    assert applications.claim("Company 1")
+    assert not applications.claim("Company 1")
+    applications.record("Company 1", APPLIED_STATUS)
+    assert not applications.claim("Company 1")
+    applications.close()
+
+def test_stale_claims_are_counted_then_released(tmp_path, capsys):
+    db = str(tmp_path / "data.db")
+    applications = Applications(db)
+    for name in ("Company 1", "Company 2", "Company 3"):
+        applications.claim(name)
+    applications.record("Company 3", APPLIED_STATUS)
+    # Company 1 was claimed two hours ago by a worker that never recorded the outcome
+    conn = sqlite3.connect(db)
+    with conn:
+        conn.execute("UPDATE applications SET updated_at = updated_at - 7200 WHERE name IN ('Company 1', 'Company 3')")
+    conn.close()
+
+    assert main(["stats", "--db", db]) == 0
+    assert json.loads(capsys.readouterr().out)["applications"] == {"applied": 1, "claimed": 2, "stale_claims": 1}
+
+    assert applications.release_stale_claims() == 1
+    assert applications.names(CLAIMED) == {"Company 2"}
+    assert applications.names(APPLIED_STATUS) == {"Company 3"}
+    assert applications.claim("Company 1")
+    applications.close()
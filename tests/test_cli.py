@@ -0,0 +1,81 @@
+import hashlib
+import json
+import sqlite3
+
+import cli
+
+def digest(path):
+    with open(path, "rb") as f:
+        return hashlib.sha256(f.read()).hexdigest()
+
+def old_db(tmp_path):
+    """
+    Create a DB with only the companies table of the first schema, without migrations nor WAL.
+    """
+    db = str(tmp_path / "data.db")
+    conn = sqlite3.connect(db)
+    conn.execute(f"CREATE TABLE companies (id INTEGER PRIMARY KEY, {', '.join(cli.ATTRIBUTES)}, UNIQUE (name))")
+    conn.executemany(
+        "INSERT INTO companies (name, location, spontaneous_application, all_offers) VALUES (?, ?, ?, '[]')",
+        [("Company 1", "Paris", "Yes"), ("Company 2", "Lyon", "Yes")]
+    )
+    conn.commit()
+    conn.close()
+    return db
+
+def test_stats_leaves_the_db_untouched(tmp_path, capsys):
+    db = old_db(tmp_path)
+    before = digest(db)
+
+    assert cli.main(["stats", "--db", db]) == 0
+
+    counts = json.loads(capsys.readouterr().out)
+    assert counts == {"companies": 2, "offers": 0, "frontier": {}, "applications": {}}
+    assert digest(db) == before
+    assert sorted(path.name for path in tmp_path.iterdir()) == ["data.db"]
+
+def test_stats_counts_frontier_and_applications(tmp_path, capsys):
+    from Applications import Applications, APPLIED_STATUS
+    from Frontier import Frontier
+
+    db = str(tmp_path / "data.db")
+    frontier = Frontier(db)
+    frontier.add_many("listing", [("https://example.com/fr/companies?page=1", None)])
+    frontier.close()
+    applications = Applications(db)
+    applications.record("Company 1", APPLIED_STATUS)
+    applications.close()
+
+    assert cli.main(["stats", "--db", db]) == 0
+
+    counts = json.loads(capsys.readouterr().out)
+    assert counts["frontier"] == {"listing/pending": 1}
+    assert counts["applications"] == {"applied": 1, "stale_claims": 0}
+
+def test_query_leaves_the_db_untouched(tmp_path, capsys):
+    db = old_db(tmp_path)
+    before = digest(db)
+
+    assert cli.main(["query", "--db", db, "--location", "Paris", "--columns", "name", "location"]) == 0
+
+    assert [json.loads(line) for line in capsys.readouterr().out.splitlines()] == [{"name": "Company 1", "location": "Paris"}]
+    assert digest(db) == before
+    assert sorted(path.name for path in tmp_path.iterdir()) == ["data.db"]
+
+def test_export_leaves_the_db_untouched(tmp_path):
+    db = old_db(tmp_path)
+    before = digest(db)
+
+    assert cli.main(["export", "--db", db, "--format", "csv", "--compression", "none", "--output", str(tmp_path / "companies.csv")]) == 0
+
+    with open(tmp_path / "companies.csv", encoding="utf-8") as f:
+        assert len(f.read().splitlines()) == 3
+    assert digest(db) == before
+
+def test_read_commands_do_not_create_a_missing_db(tmp_path):
+    db = str(tmp_path / "missing.db")
+
+    for command in (["query"], ["stats"], ["export", "--format", "csv", "--output", str(tmp_path / "companies.csv")]):
+        assert cli.main(command + ["--db", db]) == 1
+
+    assert list(tmp_path.iterdir()) == []
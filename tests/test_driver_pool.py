@@ -0,0 +1,46 @@
+import DriverPool as driver_pool
+from DriverPool import DriverPool
+
+class FakeDriver:
+    current_url = "about:blank"
+
+    def quit(self):
+        pass
+
+def scrape_with(monkeypatch, drivers, cards, max_restarts=3):
+    """
+    Run a one-worker pool over the cards, init_driver returning the given drivers in turn, and return
+    the results and the number of init_driver calls.
+    """
+    drivers = iter(drivers)
+    calls = []
+    def init_driver():
+        calls.append(1)
+        return next(drivers, None)
+    monkeypatch.setattr(driver_pool, "init_driver", init_driver)
+    monkeypatch.setattr(driver_pool, "get_card_name", lambda block: block)
+    monkeypatch.setattr(driver_pool, "get_companys_infos", lambda driver, block: {"Name": block})
+    monkeypatch.setattr(driver_pool, "construct_company_object", lambda infos: infos["Name"])
+
+    results = []
+    pool = DriverPool(size=1, max_restarts=max_restarts, on_result=lambda key, company: results.append((key, company)))
+    pool.start()
+    for card in cards:
+        pool.submit(card, card)
+    pool.join()
+    pool.close()
+    return results, len(calls)
+
+def test_worker_without_driver_at_startup_recovers(monkeypatch):
+    # Every attempt of the startup fails, the driver starts on the first card
+    results, calls = scrape_with(monkeypatch, [None, None, None, FakeDriver()], ["a", "b"])
+
+    assert results == [("a", "a"), ("b", "b")]
+    assert calls == 4
+
+def test_worker_stops_starting_drivers_after_max_restarts(monkeypatch):
+    results, calls = scrape_with(monkeypatch, [], ["a", "b", "c", "d", "e"])
+
+    # Three starts of three attempts each, then the cards are dropped
+    assert results == [(card, None) for card in "abcde"]
+    assert calls == 9
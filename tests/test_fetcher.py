@@ -0,0 +1,84 @@
+import time
+
+from conftest import read_fixture
+from fetcher import HttpFetcher
+from PageCache import PageCache
+from RateLimiter import RateLimiter, UnlimitedRateLimiter
+
+JOBS = read_fixture("jobs.html")
+SHOWCASE = read_fixture("showcase.html")
+
+def test_fetch_many_requests_each_url_once(server):
+    server.routes["/fr/companies/company-1/jobs"] = (200, {"Content-Type": "text/html"}, JOBS)
+    server.routes["/fr/companies/company-1"] = (200, {"Content-Type": "text/html"}, SHOWCASE)
+    jobs, showcase = server.url("/fr/companies/company-1/jobs"), server.url("/fr/companies/company-1")
+
+    with HttpFetcher(4, 5, limiter=UnlimitedRateLimiter()) as fetcher:
+        pages = fetcher.fetch_many([jobs, showcase, jobs])
+
+    assert pages == {jobs: JOBS, showcase: SHOWCASE}
+    assert sorted(server.paths()) == ["/fr/companies/company-1", "/fr/companies/company-1/jobs"]
+
+def test_failed_page_is_none(server):
+    with HttpFetcher(4, 5, limiter=UnlimitedRateLimiter()) as fetcher:
+        assert fetcher.fetch(server.url("/missing")) is None
+
+def test_fresh_cached_page_is_not_requested_again(server, tmp_path):
+    server.routes["/jobs"] = (200, {}, JOBS)
+    cache = PageCache(str(tmp_path), ttl={"jobs": 3600})
+
+    with HttpFetcher(4, 5, cache, limiter=UnlimitedRateLimiter()) as fetcher:
+        assert fetcher.fetch(server.url("/jobs"), "jobs") == JOBS
+        assert fetcher.fetch(server.url("/jobs"), "jobs") == JOBS
+
+    assert server.paths() == ["/jobs"]
+    assert (cache.hits, cache.misses) == (1, 1)
+    cache.close()
+
+def test_stale_cached_page_is_revalidated(server, tmp_path):
+    def jobs(method, path, headers, body):
+        if headers.get("If-None-Match") == '"v1"':
+            return 304, {"ETag": '"v1"'}, ""
+        return 200, {"ETag": '"v1"'}, JOBS
+    server.routes["/jobs"] = jobs
+    cache = PageCache(str(tmp_path), ttl={"jobs": 0})
+
+    with HttpFetcher(4, 5, cache, limiter=UnlimitedRateLimiter()) as fetcher:
+        assert fetcher.fetch(server.url("/jobs"), "jobs") == JOBS
+        assert fetcher.fetch(server.url("/jobs"), "jobs") == JOBS
+
+    assert [headers.get("If-None-Match") for _, _, headers, _ in server.requests] == [None, '"v1"']
+    assert cache.revalidated == 1
+    cache.close()
+
+def test_throttled_page_is_retried_after_retry_after(server):
+    responses = iter([(429, {"Retry-After": "0.3"}, ""), (200, {}, JOBS)])
+    server.routes["/jobs"] = lambda *request: next(responses)
+    limiter = RateLimiter(rate=1000, burst=100)
+
+    start = time.monotonic()
+    with HttpFetcher(4, 5, limiter=limiter) as fetcher:
+        assert fetcher.fetch(server.url("/jobs")) == JOBS
+
+    assert time.monotonic() - start >= 0.3
+    assert server.paths() == ["/jobs", "/jobs"]
+    assert limiter.bucket(server.url("/jobs")).failures == 0
+
+def test_throttled_last_attempt_keeps_the_backoff(server):
+    server.routes["/jobs"] = (503, {"Retry-After": "0"}, "")
+    limiter = RateLimiter(rate=1000, burst=100)
+
+    with HttpFetcher(4, 5, limiter=limiter, retries=1) as fetcher:
+        assert fetcher.fetch(server.url("/jobs")) is None
+
+    assert server.paths() == ["/jobs", "/jobs"]
+    assert limiter.bucket(server.url("/jobs")).failures == 1
+
+def test_http_backend_extracts_the_generated_jobs_page(server):
+    from functions import get_element_by_http, parse_job_offers
+
+    server.routes["/jobs"] = (200, {}, JOBS)
+    with HttpFetcher(4, 5, limiter=UnlimitedRateLimiter()) as fetcher:
+        offers = parse_job_offers(get_element_by_http(fetcher, server.url("/jobs")))
+
+    assert offers == [f"Job offer {i}" for i in range(12)] + ["Candidature spontanée"]
@@ -0,0 +1,77 @@
+import multiprocessing
+import sqlite3
+import time
+
+from Frontier import Frontier, DONE, IN_PROGRESS
+
+CARDS = [f"https://www.welcometothejungle.com/fr/companies/company-{i}" for i in range(200)]
+
+def frontier_with_cards(tmp_path, cards=CARDS, max_attempts=3):
+    db = str(tmp_path / "data.db")
+    frontier = Frontier(db, max_attempts)
+    frontier.add_many("company", [(url, None) for url in cards])
+    return db, frontier
+
+def lease_all(db, owner, results):
+    """
+    Worker process: lease cards until none is left and report them, marking them done as the sink would.
+    """
+    frontier = Frontier(db)
+    leased = []
+    while True:
+        cards = frontier.lease("company", owner, 5, 300)
+        if not cards:
+            break
+        leased.extend(url for url, _ in cards)
+        frontier.set_state([url for url, _ in cards], DONE)
+    frontier.close()
+    results.put((owner, leased))
+
+def test_worker_processes_lease_disjoint_cards(tmp_path):
+    db, frontier = frontier_with_cards(tmp_path)
+    frontier.close()
+    context = multiprocessing.get_context("spawn")
+    results = context.Queue()
+
+    processes = [context.Process(target=lease_all, args=(db, f"worker-{index}", results)) for index in range(4)]
+    for process in processes:
+        process.start()
+    leased = dict(results.get(timeout=60) for _ in processes)
+    for process in processes:
+        process.join()
+
+    every_lease = [url for urls in leased.values() for url in urls]
+    assert len(every_lease) == len(CARDS)
+    assert set(every_lease) == set(CARDS)
+    frontier = Frontier(db)
+    assert frontier.remaining("company") == 0
+    frontier.close()
+
+def test_expired_lease_is_handed_out_again(tmp_path):
+    db, frontier = frontier_with_cards(tmp_path, CARDS[:1])
+
+    # The first worker starts the card, as scrape_cards does, then stops without finishing it
+    assert frontier.lease("company", "crashed", 5, 0.2) == [(CARDS[0], None)]
+    frontier.set_state(CARDS[0], IN_PROGRESS)
+    assert frontier.lease("company", "other", 5, 300) == []
+    assert frontier.remaining("company") == 1
+
+    time.sleep(0.3)
+    assert frontier.lease("company", "other", 5, 300) == [(CARDS[0], None)]
+    conn = sqlite3.connect(db)
+    assert conn.execute('SELECT lease_owner FROM frontier WHERE url = ?', (CARDS[0],)).fetchone() == ("other",)
+    conn.close()
+    frontier.close()
+
+def test_remaining_reaches_zero_once_attempts_are_used(tmp_path):
+    db, frontier = frontier_with_cards(tmp_path, CARDS[:2], max_attempts=2)
+    frontier.set_state(CARDS[1], DONE)
+
+    for attempt in range(2):
+        assert frontier.lease("company", f"worker-{attempt}", 5, 0.05) == [(CARDS[0], None)]
+        frontier.set_state(CARDS[0], IN_PROGRESS)
+        time.sleep(0.1)
+
+    assert frontier.lease("company", "worker-2", 5, 300) == []
+    assert frontier.remaining("company") == 0
+    frontier.close()
@@ -0,0 +1,51 @@
+import sqlite3
+import struct
+
+from Company import create_table
+from KnownCompanies import BloomFilter, KnownCompanies
+
+def add_companies(db, names):
+    create_table(db)
+    conn = sqlite3.connect(db)
+    with conn:
+        conn.executemany("INSERT INTO companies (name) VALUES (?)", [(name,) for name in names])
+    conn.close()
+
+def names(start, stop):
+    return [f"Company {i}" for i in range(start, stop)]
+
+def test_filter_saturated_by_several_runs_is_rebuilt(tmp_path):
+    db, bloom_file = str(tmp_path / "data.db"), str(tmp_path / "known.bloom")
+    add_companies(db, names(0, 10))
+    KnownCompanies(db, bloom_file).close()
+    assert BloomFilter.load(bloom_file).capacity == 1000
+
+    # Each run scrapes more companies than the filter was sized for
+    for run in range(1, 4):
+        known = KnownCompanies(db, bloom_file)
+        run_names = names(run * 1000, run * 1000 + 1000)
+        add_companies(db, run_names)
+        for name in run_names:
+            known.add(name)
+        known.close()
+
+        bloom = BloomFilter.load(bloom_file)
+        assert bloom.rows == 10 + run * 1000
+        assert bloom.rows <= bloom.capacity
+
+    known = KnownCompanies(db, bloom_file)
+    assert all(name in known for name in names(3000, 4000))
+    assert "Company 5000" not in known
+    known.close()
+
+def test_filter_file_of_the_older_header_is_rebuilt(tmp_path):
+    db, bloom_file = str(tmp_path / "data.db"), str(tmp_path / "known.bloom")
+    add_companies(db, names(0, 10))
+    with open(bloom_file, "wb") as f:
+        f.write(struct.pack("<QQQ", 64, 1, 10) + bytes(8))
+
+    known = KnownCompanies(db, bloom_file)
+
+    assert "Company 3" in known
+    assert known.bloom.capacity == 1000
+    known.close()
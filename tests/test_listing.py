@@ -0,0 +1,49 @@
+import functions
+import listing
+from benchmark import FixtureDriver
+from conftest import read_fixture
+from PageCache import PageCache
+from RateLimiter import UnlimitedRateLimiter
+
+PAGES = [f"https://www.welcometothejungle.com/fr/companies?page={page}" for page in range(1, 4)]
+
+class ListingDriver(FixtureDriver):
+    def quit(self):
+        pass
+
+def use_cache(monkeypatch, tmp_path):
+    cache = PageCache(str(tmp_path), ttl={"listing": 3600})
+    monkeypatch.setattr(functions, "page_cache", cache)
+    monkeypatch.setattr(functions, "rate_limiter", UnlimitedRateLimiter())
+    return cache
+
+def test_cached_listing_pages_start_no_driver(monkeypatch, tmp_path):
+    cache = use_cache(monkeypatch, tmp_path)
+    for url in PAGES:
+        cache.put(url, "listing", read_fixture("listing.html"))
+    started = []
+    monkeypatch.setattr(listing, "init_driver", lambda: started.append(1))
+
+    pages = listing.DriverPages(2)
+    soups = dict(pages.fetch(PAGES))
+    pages.close()
+
+    assert started == []
+    assert [len(listing.parse_cards(soups[url])) for url in PAGES] == [30, 30, 30]
+
+def test_missing_listing_pages_are_loaded_and_cached(monkeypatch, tmp_path):
+    cache = use_cache(monkeypatch, tmp_path)
+    cache.put(PAGES[0], "listing", read_fixture("listing.html"))
+    drivers = []
+    def init_driver():
+        drivers.append(ListingDriver({"listing": read_fixture("listing.html")}))
+        return drivers[-1]
+    monkeypatch.setattr(listing, "init_driver", init_driver)
+
+    pages = listing.DriverPages(1)
+    soups = dict(pages.fetch(PAGES))
+    pages.close()
+
+    assert len(drivers) == 1
+    assert all(soups[url] is not None for url in PAGES)
+    assert all(cache.get(url, "listing") is not None for url in PAGES)
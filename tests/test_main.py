@@ -0,0 +1,30 @@
+import main
+from Frontier import Frontier
+
+LISTING = "https://www.welcometothejungle.com/fr/companies?page=1&query="
+
+class SearchDriver:
+    current_url = LISTING
+
+def seed(monkeypatch, tmp_path, number_of_pages):
+    monkeypatch.setattr(main, "get_url", lambda driver, url: None)
+    monkeypatch.setattr(main, "find_and_click", lambda *args, **kwargs: True)
+    monkeypatch.setattr(main, "get_number_of_pages", lambda driver: number_of_pages)
+    frontier = Frontier(str(tmp_path / "data.db"))
+    seeded = main.seed_listing_pages(SearchDriver(), frontier)
+    return seeded, frontier
+
+def test_listing_pages_are_seeded(monkeypatch, tmp_path):
+    seeded, frontier = seed(monkeypatch, tmp_path, 3)
+
+    assert seeded
+    assert len(frontier.pending("listing")) == 3
+    frontier.close()
+
+def test_unknown_number_of_pages_seeds_nothing(monkeypatch, tmp_path):
+    seeded, frontier = seed(monkeypatch, tmp_path, None)
+
+    assert not seeded
+    # The next run finds an empty frontier and runs the search again
+    assert frontier.is_empty("listing")
+    frontier.close()
@@ -0,0 +1,31 @@
+import pytest
+
+from conftest import read_fixture
+from Parser import BACKENDS, check_parity, extract, get_backend
+
+# The fixtures are generated by benchmark.make_fixtures, well-formed pages on which the backends are not expected to diverge.
+# Pages captured from the website are checked with python src/Parser.py, over the page cache.
+KINDS = ("listing", "jobs", "showcase")
+
+@pytest.fixture(autouse=True)
+def require_lxml():
+    # Without lxml, get_backend falls back to html.parser and the lxml configurations would compare html.parser to itself
+    pytest.importorskip("lxml")
+    assert get_backend("lxml") == "lxml"
+
+@pytest.mark.parametrize("kind", KINDS)
+def test_every_parser_configuration_extracts_the_same(kind):
+    assert check_parity(read_fixture(f"{kind}.html"), kind) == []
+
+@pytest.mark.parametrize("backend", BACKENDS)
+@pytest.mark.parametrize("subtrees", (False, True))
+def test_extraction_of_the_generated_pages(backend, subtrees):
+    cards = extract(read_fixture("listing.html"), "listing", backend, subtrees)
+    offers = extract(read_fixture("jobs.html"), "jobs", backend, subtrees)
+    others = extract(read_fixture("showcase.html"), "showcase", backend, subtrees)
+
+    assert len(cards) == 30
+    assert cards[1]["Name"] == "Company 1"
+    assert offers == [f"Job offer {i}" for i in range(12)] + ["Candidature spontanée"]
+    assert others["Web Site"] == "https://company.example"
+    assert others["Collaborateurs"] == "120"
@@ -0,0 +1,77 @@
+import json
+from urllib.parse import parse_qs
+
+from conftest import read_fixture
+from functions import construct_company_object
+from search import SearchClient, refinements_from_url
+from SELECTORS import MAIN_TECH_PAGE_URL
+
+QUERY_PATH = "/1/indexes/companies/query"
+PAGES = [json.loads(read_fixture(f"search_page_{page}.json")) for page in range(2)]
+
+def replay(method, path, headers, body):
+    """
+    Answer a search request with the fixture page of hits it asks for, the last one past the end.
+    """
+    page = int(request_params(body)["page"])
+    return 200, {"Content-Type": "application/json"}, json.dumps(PAGES[min(page, len(PAGES) - 1)])
+
+def request_params(body):
+    return {key: values[0] for key, values in parse_qs(json.loads(body)["params"]).items()}
+
+def client(server):
+    return SearchClient("app", "key", "companies", host=server.url(""), hits_per_page=2)
+
+def test_refinements_from_listing_url():
+    refinements = refinements_from_url(MAIN_TECH_PAGE_URL)
+
+    assert list(refinements) == ["sectors_name.fr.Tech"]
+    assert refinements["sectors_name.fr.Tech"][:2] == ["SaaS / Cloud Services", "Logiciels"]
+
+def test_iter_hits_pages_until_nb_pages(server):
+    server.routes[QUERY_PATH] = replay
+    refinements = {"sectors_name.fr.Tech": ["Logiciels", "SaaS / Cloud Services"], "offices.city": ["Paris"]}
+
+    hits = list(client(server).iter_hits(refinements))
+
+    assert [hit["name"] for hit in hits] == ["Company 1", "Company 2", "Company 3"]
+    # The replay server would keep answering, the client stops at nbPages
+    assert server.paths() == [QUERY_PATH, QUERY_PATH]
+    params = [request_params(body) for _, _, _, body in server.requests]
+    assert [p["page"] for p in params] == ["0", "1"]
+    assert params[0]["hitsPerPage"] == "2"
+    assert json.loads(params[0]["facetFilters"]) == [
+        ["sectors_name.fr.Tech:Logiciels", "sectors_name.fr.Tech:SaaS / Cloud Services"],
+        ["offices.city:Paris"],
+    ]
+    headers = {name.lower(): value for name, value in server.requests[0][2].items()}
+    assert (headers["x-algolia-application-id"], headers["x-algolia-api-key"]) == ("app", "key")
+
+def test_iter_hits_stops_on_an_empty_page(server):
+    server.routes[QUERY_PATH] = (200, {}, json.dumps({"hits": [], "nbPages": 50}))
+
+    assert list(client(server).iter_hits()) == []
+    assert server.paths() == [QUERY_PATH]
+
+def test_hits_map_to_companies(server):
+    server.routes[QUERY_PATH] = replay
+
+    companies = [construct_company_object(infos) for infos in client(server).iter_infos()]
+
+    first = companies[0]
+    assert first.name == "Company 1"
+    assert first.url_wtj == "https://www.welcometothejungle.com/fr/companies/company-1"
+    assert first.url_web_site == "https://company-1.example"
+    assert (first.domain, first.location) == ("Logiciels", "Paris")
+    assert (first.number_of_salaries, first.avg_age) == (15, 26)
+    assert companies[2].url_web_site is None
+    assert [company.location for company in companies] == ["Paris", "Lyon", "Nantes"]
+
+def test_hits_map_to_the_requested_language(server):
+    server.routes[QUERY_PATH] = replay
+
+    infos = next(client(server).iter_infos(language="en"))
+
+    assert infos["Domain"] == "Software"
+    assert infos["Link"] == "https://www.welcometothejungle.com/en/companies/company-1"
+    assert infos["Offer"] == "3 offres"
@@ -0,0 +1,49 @@
+import sqlite3
+
+from Company import Company
+from Frontier import Frontier, update_states, DONE, PENDING
+from JsonlStore import JsonlStore
+from Sink import CompanySink
+
+GOOD = "https://www.welcometothejungle.com/fr/companies/good"
+BAD = "https://www.welcometothejungle.com/fr/companies/bad"
+
+def company(name, all_offers):
+    return Company(name, f"https://www.welcometothejungle.com/fr/companies/{name}", None, "Logiciels", "Paris", 10, 30, 1, all_offers, "Yes")
+
+def states(db):
+    conn = sqlite3.connect(db)
+    try:
+        return dict(conn.execute('SELECT url, state FROM frontier'))
+    finally:
+        conn.close()
+
+def test_only_saved_companies_mark_their_cards_done(tmp_path):
+    db = str(tmp_path / "data.db")
+    frontier = Frontier(db)
+    frontier.add_many("company", [(GOOD, None), (BAD, None)])
+    frontier.close()
+
+    sink = CompanySink(db, on_batch=lambda cursor, urls: update_states(cursor, urls, DONE)).start()
+    sink.put(company("good", ["Job offer"]), GOOD)
+    # A set cannot be serialised to JSON, so the batch fails and is saved one company at a time
+    sink.put(company("bad", {"Job offer"}), BAD)
+    sink.close()
+
+    conn = sqlite3.connect(db)
+    names = [name for name, in conn.execute('SELECT name FROM companies')]
+    conn.close()
+    assert names == ["good"]
+    assert states(db) == {GOOD: DONE, BAD: PENDING}
+    assert sink.written == 1
+
+def test_writer_survives_a_failed_jsonl_append(tmp_path):
+    db = str(tmp_path / "data.db")
+    store = JsonlStore(str(tmp_path / "missing" / "data.jsonl"))
+
+    sink = CompanySink(db, batch_size=1, queue_size=1, jsonl=store).start()
+    for index in range(5):
+        sink.put(company(f"company-{index}", []))
+    sink.close()
+
+    assert sink.written == 5
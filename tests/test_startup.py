@@ -0,0 +1,9 @@
+from benchmark import bench_startup
+from CONST import STARTUP_BUDGET_MS
+
+def test_data_commands_start_within_the_budget():
+    results = bench_startup(runs=3)
+
+    # Each command reports its median time and the heavy modules it imported
+    assert results["budget_ms"] == STARTUP_BUDGET_MS
+    assert results["ok"], results["commands"]
@@ -0,0 +1,20 @@
+from functions import AdaptiveTimeout
+
+def test_timeout_settles_on_fast_pages():
+    timeout = AdaptiveTimeout(minimum=2, maximum=15)
+    assert timeout.value() == 15
+    for _ in range(20):
+        timeout.record(0.1)
+    assert timeout.value() == 2
+
+def test_timeout_grows_again_after_timeouts():
+    timeout = AdaptiveTimeout(minimum=2, maximum=15)
+    for _ in range(20):
+        timeout.record(0.1)
+
+    values = []
+    for _ in range(4):
+        timeout.record_timeout(timeout.value())
+        values.append(timeout.value())
+
+    assert values == [4, 8, 15, 15]